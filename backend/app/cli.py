@@ -5,13 +5,23 @@ Usage:
     python -m app.cli migrate       # Run pending migrations
     python -m app.cli reset         # Clear all database data
     python -m app.cli recreate      # Recreate database from scratch
+    python -m app.cli status        # Show applied and pending migrations
 """
 
+import asyncio
+import inspect
 import sys
 from pathlib import Path
+from typing import Awaitable, Callable, Dict, Union
 from .db import get_db, reset_db, recreate_db, init_db
 from .migrations.manager import MigrationManager
 
+try:
+    import uvloop
+    _loop_factory = uvloop.new_event_loop
+except ImportError:  # uvloop ships with uvicorn[standard], but not on Windows
+    _loop_factory = None
+
 
 def migrate():
     """Run all pending migrations."""
@@ -72,30 +82,36 @@ def show_status():
         print("\n✓ No pending migrations")
 
 
+_COMMANDS: Dict[str, Callable[[], Union[None, Awaitable[None]]]] = {
+    'migrate': migrate,
+    'reset': reset,
+    'recreate': recreate,
+    'status': show_status,
+}
+
+
 def main():
     """Main CLI entry point."""
     if len(sys.argv) < 2:
-        print(__doc__)
-        sys.exit(1)
+        print(__doc__, file=sys.stderr)
+        sys.exit(2)
 
-    command = sys.argv[1]
-
-    commands = {
-        'migrate': migrate,
-        'reset': reset,
-        'recreate': recreate,
-        'status': show_status,
-    }
-
-    if command not in commands:
-        print(f"Unknown command: {command}")
-        print(__doc__)
-        sys.exit(1)
+    command = _COMMANDS.get(sys.argv[1])
+    if command is None:
+        print(f"Unknown command: {sys.argv[1]}", file=sys.stderr)
+        print(__doc__, file=sys.stderr)
+        sys.exit(2)
 
     try:
-        commands[command]()
+        if inspect.iscoroutinefunction(command):
+            # One loop for the whole invocation, so async commands share the
+            # pooled LLM client instead of rebuilding it per asyncio.run()
+            with asyncio.Runner(loop_factory=_loop_factory) as runner:
+                runner.run(command())
+        else:
+            command()
     except Exception as e:
-        print(f"Error: {e}")
+        print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
 
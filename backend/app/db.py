@@ -4,10 +4,372 @@ Database module for Zaik game.
 Handles TinyDB initialization, connection management, and database utilities.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Optional
-from tinydb import TinyDB, Query
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, TypeVar
+from tinydb import TinyDB
+import orjson
+from tinydb.middlewares import CachingMiddleware
+from tinydb.storages import JSONStorage, Storage
+import asyncio
+import atexit
+import functools
+import logging
 import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# TinyDB isn't thread-safe, so request-time database work runs on a single
+# dedicated thread: off the event loop, but never two operations at once
+_db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='zaik-db')
+
+# Callbacks that drop objects parsed from the database, run when its
+# contents are reloaded, reset or closed
+_reload_callbacks: List[Callable[[], None]] = []
+
+
+def on_reload(fn: Callable[[], None]) -> Callable[[], None]:
+    """
+    Register a callback to run whenever cached database contents go stale.
+
+    Services that keep parsed documents in memory register their cache-
+    clearing function here (usable as a decorator), so the storage can
+    invalidate them without importing the services.
+
+    Args:
+        fn: Callback taking no arguments
+
+    Returns:
+        fn, unchanged
+    """
+    _reload_callbacks.append(fn)
+    return fn
+
+
+def _notify_reload() -> None:
+    """Run every registered reload callback."""
+    for fn in _reload_callbacks:
+        fn()
+
+
+class _TrackedDocument(dict):
+    """
+    A stored document that flags itself when it is modified in place.
+
+    TinyDB updates documents by mutating the dicts the storage handed it, so
+    the storage can't tell which documents a write changed by comparing
+    them. Instead each document adds its key to the storage's dirty set.
+    Only top-level changes are seen, which covers every TinyDB operation.
+    """
+
+    __slots__ = ('_key', '_dirty')
+
+    def __init__(self, document: Dict[str, Any], key: Tuple[str, str], dirty: Set[Tuple[str, str]]):
+        super().__init__(document)
+        self._key = key
+        self._dirty = dirty
+
+    def __setitem__(self, name, value):
+        self._dirty.add(self._key)
+        super().__setitem__(name, value)
+
+    def __delitem__(self, name):
+        self._dirty.add(self._key)
+        super().__delitem__(name)
+
+    def __ior__(self, other):
+        self._dirty.add(self._key)
+        return super().__ior__(other)
+
+    def update(self, *args, **kwargs):
+        self._dirty.add(self._key)
+        super().update(*args, **kwargs)
+
+    def setdefault(self, name, default=None):
+        self._dirty.add(self._key)
+        return super().setdefault(name, default)
+
+    def pop(self, *args):
+        self._dirty.add(self._key)
+        return super().pop(*args)
+
+    def popitem(self):
+        self._dirty.add(self._key)
+        return super().popitem()
+
+    def clear(self):
+        self._dirty.add(self._key)
+        super().clear()
+
+
+class SQLiteStorage(Storage):
+    """
+    TinyDB storage backed by SQLite in WAL mode.
+
+    Each document is stored as its own row, so a write only serializes and
+    touches the rows of documents that were inserted, changed or removed
+    instead of rewriting the whole database file like TinyDB's default
+    JSONStorage. All changed rows of a write are applied in a single
+    transaction, and `batch()` groups several TinyDB writes into one.
+    Rows are served from memory and reloaded when another process commits.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the SQLite database.
+
+        Args:
+            path: Path to the SQLite database file
+        """
+        super().__init__()
+        self._conn = sqlite3.connect(
+            str(path), isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " tbl TEXT NOT NULL,"
+            " doc_id TEXT NOT NULL,"
+            " body TEXT NOT NULL,"
+            " PRIMARY KEY (tbl, doc_id)"
+            ") WITHOUT ROWID"
+        )
+
+        # In-memory view handed to TinyDB, and the doc ids of every table as
+        # last committed so inserts and removals can be found by set diff
+        self._data: Optional[Dict[str, Dict[str, Any]]] = None
+        self._doc_ids: Dict[str, Set[str]] = {}
+        # (table, doc_id) of documents modified in place since the last commit
+        self._dirty: Set[Tuple[str, str]] = set()
+        # The table dicts as of the last commit. TinyDB replaces a table's
+        # dict whenever it writes to that table, so a table that is still
+        # the same object has had nothing inserted or removed
+        self._committed_tables: Dict[str, Dict[str, Any]] = {}
+        # Set when write() is handed untracked data that must all be written
+        self._rewrite = False
+        self._loaded_version = 0
+        self._batch_depth = 0
+        self._pending = False
+
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Return the database contents, loading them from SQLite as needed.
+
+        The rows are kept in memory between calls and reloaded only when
+        another connection (e.g. `python -m app.cli migrate` run next to the
+        server) has committed to the file since they were loaded.
+        """
+        if self._data is None:
+            self._load()
+        else:
+            self.refresh()
+        return self._data
+
+    def refresh(self) -> None:
+        """
+        Reload the rows if another connection committed since they were loaded.
+
+        Cheap when nothing changed (one PRAGMA), and skipped while a batch
+        holds uncommitted writes that a reload would drop.
+        """
+        if self._data is not None and not self._pending and self._data_version() != self._loaded_version:
+            self._load()
+
+    def _data_version(self) -> int:
+        """SQLite's counter of commits made to the file by other connections."""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _load(self) -> None:
+        """Load every row, replacing the in-memory view."""
+        reloading = self._data is not None
+        self._loaded_version = self._data_version()
+        self._dirty = set()
+        data: Dict[str, Dict[str, Any]] = {}
+        for tbl, doc_id, body in self._conn.execute(
+            "SELECT tbl, doc_id, body FROM documents"
+        ):
+            data.setdefault(tbl, {})[doc_id] = _TrackedDocument(
+                orjson.loads(body), (tbl, doc_id), self._dirty
+            )
+        self._data = data
+        self._doc_ids = {tbl: set(documents) for tbl, documents in data.items()}
+        self._committed_tables = dict(data)
+        if reloading:
+            # Objects parsed from the old rows are stale as well
+            _notify_reload()
+
+    def write(self, data: Dict[str, Dict[str, Any]]) -> None:
+        """Persist the database contents (deferred while batching)."""
+        if data is not self._data:
+            # Not TinyDB writing back what read() returned (e.g. a legacy
+            # import or drop_tables()), so none of it is tracked
+            self._rewrite = True
+            self._committed_tables = {}
+        self._data = data
+        if self._batch_depth:
+            self._pending = True
+            return
+        self._commit()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group every write made inside the block into one transaction."""
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._pending:
+                self._commit()
+
+    def _commit(self) -> None:
+        """Write inserted and changed rows and delete removed rows in one transaction."""
+        self._pending = False
+        data = self._data or {}
+        rewrite, self._rewrite = self._rewrite, False
+        changed: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        added: Dict[str, Set[str]] = {}
+        removed: Dict[str, Set[str]] = {}
+        for tbl, documents in data.items():
+            if self._committed_tables.get(tbl) is documents:
+                continue
+            old_ids = self._doc_ids.get(tbl, set())
+            added[tbl] = documents.keys() - old_ids
+            removed[tbl] = old_ids - documents.keys()
+            new_ids = documents if rewrite else added[tbl]
+            changed.update(((tbl, doc_id), documents[doc_id]) for doc_id in new_ids)
+        for tbl in self._doc_ids.keys() - data.keys():
+            removed[tbl] = self._doc_ids[tbl]
+        for tbl, doc_id in self._dirty:
+            document = data.get(tbl, {}).get(doc_id)
+            if document is not None:
+                changed[(tbl, doc_id)] = document
+
+        deleted = [(tbl, doc_id) for tbl, doc_ids in removed.items() for doc_id in doc_ids]
+        if changed or deleted:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO documents (tbl, doc_id, body) VALUES (?, ?, ?)",
+                    [(tbl, doc_id, orjson.dumps(document).decode())
+                     for (tbl, doc_id), document in changed.items()],
+                )
+                self._conn.executemany(
+                    "DELETE FROM documents WHERE tbl = ? AND doc_id = ?", deleted
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        self._dirty.clear()
+        for (tbl, doc_id), document in changed.items():
+            if not isinstance(document, _TrackedDocument):
+                # Newly inserted; track its in-place changes from now on
+                data[tbl][doc_id] = _TrackedDocument(document, (tbl, doc_id), self._dirty)
+        for tbl in self._doc_ids.keys() - data.keys():
+            del self._doc_ids[tbl]
+        for tbl, doc_ids in added.items():
+            self._doc_ids.setdefault(tbl, set()).update(doc_ids)
+            self._doc_ids[tbl].difference_update(removed[tbl])
+        self._committed_tables = dict(data)
+
+    def flush(self) -> None:
+        """Commit any writes deferred by an open batch."""
+        if self._pending:
+            self._commit()
+
+    def close(self) -> None:
+        """Flush pending writes and close the connection."""
+        self.flush()
+        self._conn.close()
+
+
+def storage_batch(db: TinyDB):
+    """
+    Group the writes made inside the returned context into one commit.
+
+    Only storages with a `batch()` context (SQLiteStorage) batch; for any
+    other storage this is a no-op.
+
+    Args:
+        db: TinyDB instance whose writes should be grouped
+    """
+    batch = getattr(db.storage, 'batch', None)
+    return batch() if batch else nullcontext()
+
+
+def storage_refresh(db: TinyDB) -> None:
+    """
+    Pick up commits made to the database by other connections.
+
+    Call before trusting objects cached from the database; a reload runs the
+    on_reload() callbacks, which drop them. Only storages with a `refresh()`
+    method (SQLiteStorage) can change underneath us; for any other storage
+    this is a no-op.
+
+    Args:
+        db: TinyDB instance to refresh
+    """
+    refresh = getattr(db.storage, 'refresh', None)
+    if refresh:
+        refresh()
+
+
+def _resolve_db_path() -> Path:
+    """Get database file path from environment or use default."""
+    db_dir = os.getenv('ZAIK_DB_DIR', 'data')
+    db_name = os.getenv('ZAIK_DB_NAME', 'zaik.db')
+
+    # Create data directory if it doesn't exist
+    db_path = Path(db_dir)
+    db_path.mkdir(parents=True, exist_ok=True)
+
+    return db_path / db_name
+
+
+class ORJSONStorage(JSONStorage):
+    """
+    TinyDB's single-file JSON storage, serialized with orjson.
+
+    Drop-in for JSONStorage with the same file format; the file is opened in
+    binary mode so orjson's bytes are written without an extra decode.
+    """
+
+    def __init__(self, path: str, create_dirs: bool = False, **kwargs):
+        """
+        Open (or create) the JSON file.
+
+        Args:
+            path: Path to the JSON database file
+            create_dirs: Create missing parent directories
+        """
+        super().__init__(path, create_dirs=create_dirs, access_mode='rb+', **kwargs)
+
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Load the whole database file, or None if it is empty."""
+        self._handle.seek(0, os.SEEK_END)
+        if not self._handle.tell():
+            # Empty file; TinyDB initializes the database itself
+            return None
+        self._handle.seek(0)
+        return orjson.loads(self._handle.read())
+
+    def write(self, data: Dict[str, Dict[str, Any]]) -> None:
+        """Rewrite the database file with the current contents."""
+        self._handle.seek(0)
+        self._handle.write(orjson.dumps(data))
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        # Drop leftover bytes if the file got shorter
+        self._handle.truncate()
 
 
 class Database:
@@ -15,29 +377,63 @@ class Database:
 
     _instance: Optional['Database'] = None
     _db: Optional[TinyDB] = None
+    _path: Optional[Path] = None
+    _lock = threading.Lock()
 
     def __new__(cls):
         """Singleton pattern to ensure single database instance."""
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
         return cls._instance
 
     def __init__(self):
         """Initialize database connection."""
         if self._db is None:
-            db_path = self._get_db_path()
-            self._db = TinyDB(db_path)
+            with self._lock:
+                if self._db is None:
+                    self._db = self._open()
 
-    def _get_db_path(self) -> Path:
-        """Get database file path from environment or use default."""
-        db_dir = os.getenv('ZAIK_DB_DIR', 'data')
-        db_name = os.getenv('ZAIK_DB_NAME', 'zaik.json')
+    def _open(self) -> TinyDB:
+        """Open the database with the storage matching its file type."""
+        # Resolved on each open (under the lock) rather than once per process,
+        # so the environment at open time decides, and kept for recreate()
+        db_path = self._path = _resolve_db_path()
+        if db_path.suffix == '.json':
+            # Legacy single-file JSON database; writes are buffered in memory
+            # and flushed on close() / flush() instead of rewriting the file
+            # on every change
+            return TinyDB(db_path, storage=CachingMiddleware(ORJSONStorage))
+
+        legacy_path = db_path.with_suffix('.json')
+        import_legacy = not db_path.exists() and legacy_path.exists()
+        db = TinyDB(db_path, storage=SQLiteStorage)
+        if import_legacy:
+            self._import_legacy(db, legacy_path, db_path)
+        return db
+
+    @staticmethod
+    def _import_legacy(db: TinyDB, legacy_path: Path, db_path: Path) -> None:
+        """
+        Copy a JSON database left by an older version into a new SQLite one.
 
-        # Create data directory if it doesn't exist
-        db_path = Path(db_dir)
-        db_path.mkdir(parents=True, exist_ok=True)
+        Runs once: the JSON file is renamed afterwards so neither a restart
+        nor recreate() imports it again, and kept as a backup.
+        """
+        data = orjson.loads(legacy_path.read_bytes() or b'{}')
+        # One write, so the import commits as a single transaction
+        db.storage.write(data)
+        backup_path = legacy_path.with_name(f"{legacy_path.name}.imported")
+        legacy_path.rename(backup_path)
+        logger.info(
+            "Imported %d tables from %s into %s (original kept as %s)",
+            len(data), legacy_path, db_path, backup_path
+        )
 
-        return db_path / db_name
+    def _get_db_path(self) -> Path:
+        """Get the path of the open (or last opened) database file."""
+        return self._path or _resolve_db_path()
 
     @property
     def db(self) -> TinyDB:
@@ -46,23 +442,40 @@ class Database:
             raise RuntimeError("Database not initialized")
         return self._db
 
+    def batch_write(self):
+        """
+        Group all writes made inside the returned context into one commit.
+
+        Only the SQLite backend batches; for other storages this is a no-op.
+        """
+        return storage_batch(self.db)
+
+    def flush(self):
+        """Write any buffered changes to disk."""
+        if self._db is not None:
+            self._db.storage.flush()
+
     def close(self):
         """Close database connection."""
-        if self._db:
+        if self._db is not None:
             self._db.close()
             self._db = None
+            _notify_reload()
 
     def reset(self):
         """Reset database by clearing all tables."""
-        if self._db:
+        if self._db is not None:
             self._db.drop_tables()
+            _notify_reload()
 
     def recreate(self):
         """Recreate database from scratch."""
         self.close()
         db_path = self._get_db_path()
-        if db_path.exists():
-            db_path.unlink()
+        # SQLite keeps WAL and shared-memory files next to the database
+        for path in (db_path, Path(f"{db_path}-wal"), Path(f"{db_path}-shm")):
+            if path.exists():
+                path.unlink()
         self.__init__()
 
 
@@ -90,3 +503,36 @@ def reset_db():
 def recreate_db():
     """Recreate database from scratch."""
     Database().recreate()
+
+
+def batch_write():
+    """Group all writes made inside the returned context into one commit."""
+    return Database().batch_write()
+
+
+def flush_db():
+    """Write any buffered database changes to disk."""
+    Database().flush()
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking database call on the database thread.
+
+    Args:
+        fn: Function that touches the database
+        *args: Positional arguments for fn
+        **kwargs: Keyword arguments for fn
+
+    Returns:
+        Whatever fn returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, functools.partial(fn, *args, **kwargs))
+
+
+@atexit.register
+def _close_at_exit():
+    """Flush buffered writes if the process exits without close_db()."""
+    if Database._instance is not None:
+        Database._instance.close()
@@ -0,0 +1,34 @@
+"""
+FastAPI dependencies for Zaik routes.
+
+Shared resources are created once per process in the app lifespan and kept
+on `app.state`; routes receive them through `Depends`, so tests can swap
+them with `app.dependency_overrides`.
+"""
+
+from fastapi import Request
+from tinydb import TinyDB
+
+from .llm import ScoutLLMService
+from .services.command_parser import CommandParser
+from .services.game_state import GameStateManager
+
+
+def get_llm_service(request: Request) -> ScoutLLMService:
+    """Get the application's shared LLM service."""
+    return request.app.state.llm_service
+
+
+def get_database(request: Request) -> TinyDB:
+    """Get the application's shared database handle."""
+    return request.app.state.db
+
+
+def get_game_state_manager(request: Request) -> GameStateManager:
+    """Get the application's shared GameStateManager."""
+    return request.app.state.game_state_manager
+
+
+def get_command_parser(request: Request) -> CommandParser:
+    """Get the application's shared CommandParser."""
+    return request.app.state.command_parser
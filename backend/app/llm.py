@@ -3,33 +3,168 @@ Scout LLM API Integration
 Provides interface for interacting with the Scout LLM service
 """
 
+import asyncio
+from collections import OrderedDict
+from contextlib import aclosing
+import functools
+import hashlib
+import random
+from dataclasses import dataclass
 import os
 import httpx
+import orjson
 import logging
-from typing import Optional, Dict, Any, List
-from pydantic import BaseModel
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional, Dict, Any, List, Tuple, Union, AsyncIterator
 from dotenv import load_dotenv
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Load .env file - check both /app/.env (Docker) and local .env
-load_dotenv("/app/.env")
-load_dotenv()  # Fallback to default behavior
 
+def _read_env() -> SimpleNamespace:
+    """Load .env and snapshot the Scout settings (done once, at import)."""
+    # Load .env once: /app/.env in Docker, otherwise the nearest local .env
+    docker_env = Path("/app/.env")
+    load_dotenv(docker_env if docker_env.is_file() else None)
 
-class LLMMessage(BaseModel):
-    """Represents a message in the conversation"""
+    return SimpleNamespace(
+        api_url=os.getenv("SCOUT_API_URL", ""),
+        access_token=os.getenv("SCOUT_API_ACCESS_TOKEN", ""),
+        model=os.getenv("SCOUT_MODEL", "gpt-5"),
+        health_timeout=float(os.getenv("SCOUT_HEALTH_TIMEOUT", "5.0")),
+        max_concurrency=int(os.getenv("SCOUT_MAX_CONCURRENCY", "16")),
+        max_requests_per_minute=int(os.getenv("SCOUT_MAX_RPM", "0")),
+        max_tokens_per_minute=int(os.getenv("SCOUT_MAX_TPM", "0")),
+        max_context_tokens=int(os.getenv("SCOUT_MAX_CONTEXT_TOKENS", "6000")),
+    )
+
+
+_ENV = _read_env()
+
+# Read size when streaming LLM response bodies
+_CHUNK_SIZE = 65536
+
+# Transient failures worth retrying, and the backoff between attempts
+_RETRY_ATTEMPTS = 3
+_RETRY_STATUSES = frozenset({429, 502, 503, 504})
+_RETRY_BASE_DELAY = 1.0
+_RETRY_MAX_DELAY = 30.0
+
+# Completion budget assumed for rate limiting when max_tokens isn't given
+_DEFAULT_COMPLETION_TOKENS = 512
+
+# SSE lines other than "data:" frames that carry nothing for us
+_SSE_IGNORED_PREFIXES = (":", "event:", "id:", "retry:")
+
+# Responses to (near-)deterministic requests are memoised, LRU-bounded and
+# expiring so edited prompts or model updates are picked up eventually
+_CACHE_MAX_TEMPERATURE = 0.05
+_CACHE_SIZE = 1024
+_CACHE_TTL = 600.0
+
+
+@dataclass(frozen=True, slots=True)
+class LLMMessage:
+    """
+    Represents a message in the conversation
+
+    A plain dataclass rather than a pydantic model: orjson serializes
+    dataclasses natively, so messages go straight into the request body
+    without an intermediate dict per message.
+    """
     role: str  # 'user', 'assistant', or 'system'
     content: str
 
 
+@functools.lru_cache(maxsize=64)
+def _system_message(content: str) -> Dict[str, str]:
+    """Build (once per distinct prompt) the payload dict for a system prompt."""
+    return {"role": "system", "content": content}
+
+
+class _RateLimiter:
+    """
+    Token buckets for requests-per-minute and tokens-per-minute budgets.
+
+    Both buckets start full and refill continuously. acquire() waits until a
+    request and its estimated tokens fit, so bursts are spread out instead of
+    being rejected with 429s by the API.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        """
+        Create the limiter.
+
+        Args:
+            requests_per_minute: Request budget, or 0 for no limit
+            tokens_per_minute: Token budget, or 0 for no limit
+        """
+        self._rpm = requests_per_minute
+        self._tpm = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any budget is configured."""
+        return bool(self._rpm or self._tpm)
+
+    async def acquire(self, tokens: int) -> None:
+        """
+        Wait until one request using `tokens` tokens fits the budgets.
+
+        Args:
+            tokens: Estimated tokens (prompt + completion) for the request
+        """
+        # A request larger than the whole bucket could never fit; cap it
+        if self._tpm:
+            tokens = min(tokens, self._tpm)
+
+        # Waiters queue on the lock so they are served in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                elapsed = now - self._updated
+                self._updated = now
+                if self._rpm:
+                    self._requests = min(self._rpm, self._requests + elapsed * self._rpm / 60)
+                if self._tpm:
+                    self._tokens = min(self._tpm, self._tokens + elapsed * self._tpm / 60)
+
+                wait = 0.0
+                if self._rpm and self._requests < 1:
+                    wait = (1 - self._requests) * 60 / self._rpm
+                if self._tpm and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self._tpm)
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+
+            if self._rpm:
+                self._requests -= 1
+            if self._tpm:
+                self._tokens -= tokens
+
+
+@dataclass(slots=True)
 class LLMConfig:
     """Scout LLM API configuration"""
-    def __init__(self):
-        self.api_url = os.getenv("SCOUT_API_URL", "")
-        self.access_token = os.getenv("SCOUT_API_ACCESS_TOKEN", "")
-        self.model = os.getenv("SCOUT_MODEL", "gpt-5")
+    api_url: str = _ENV.api_url
+    access_token: str = _ENV.access_token
+    model: str = _ENV.model
+    health_timeout: float = _ENV.health_timeout
+    # Chat requests on the wire at once, and per-minute request/token budgets
+    # (0 disables a budget)
+    max_concurrency: int = _ENV.max_concurrency
+    max_requests_per_minute: int = _ENV.max_requests_per_minute
+    max_tokens_per_minute: int = _ENV.max_tokens_per_minute
+    # Estimated prompt tokens kept from a conversation (0 keeps everything)
+    max_context_tokens: int = _ENV.max_context_tokens
 
     def is_configured(self) -> bool:
         """Check if LLM is properly configured"""
@@ -39,25 +174,76 @@ class LLMConfig:
 class ScoutLLMService:
     """Service for interacting with Scout LLM API"""
 
-    def __init__(self, config: Optional[LLMConfig] = None):
+    def __init__(
+        self,
+        config: Optional[LLMConfig] = None,
+        client: Optional[httpx.AsyncClient] = None
+    ):
+        """
+        Set up the service and its HTTP client.
+
+        Args:
+            config: API settings (read from the environment if omitted)
+            client: Client to send requests through instead of building one;
+                it must already carry the auth headers, and the caller closes it
+        """
         self.config = config or LLMConfig()
-        logger.info(f"Initializing Scout LLM Service")
-        logger.info(f"API URL: {self.config.api_url}")
-        logger.info(f"Model: {self.config.model}")
-        logger.info(f"Token configured: {bool(self.config.access_token)}")
-        logger.info(f"Token length: {len(self.config.access_token) if self.config.access_token else 0}")
-
-        self.client = httpx.AsyncClient(
-            timeout=30.0,
-            headers={
-                "Authorization": f"Bearer {self.config.access_token}",
-                "Content-Type": "application/json"
-            }
+        logger.info(
+            "Initializing Scout LLM Service (API URL: %s, model: %s, token configured: %s)",
+            self.config.api_url, self.config.model, bool(self.config.access_token)
+        )
+
+        # Derived once per service instead of on every request.
+        # Scout API endpoint is singular 'completion', not 'completions'
+        self._auth_header = f"Bearer {self.config.access_token}"
+        self._chat_url = f"{self.config.api_url}/api/chat/completion"
+        self._health_url = f"{self.config.api_url}/health"
+
+        # One long-lived pooled client is shared by every request (including
+        # health checks) so connections and TLS sessions are reused
+        self._owns_client = client is None
+        if client is None:
+            client = httpx.AsyncClient(
+                base_url=self.config.api_url,
+                # Fail fast on an unreachable host, allow slow generations
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                http2=True,
+                limits=httpx.Limits(
+                    max_keepalive_connections=10,
+                    max_connections=10,
+                    keepalive_expiry=30.0
+                ),
+                headers={
+                    "Authorization": self._auth_header,
+                    "Content-Type": "application/json"
+                }
+            )
+        self.client = client
+
+        # Requests currently on the wire, keyed by their serialized payload,
+        # so identical concurrent calls share one HTTP round-trip
+        self._inflight: Dict[bytes, asyncio.Task] = {}
+
+        # Completed responses (with their expiry time) keyed by a digest of
+        # the request body; only filled for temperatures low enough that
+        # replies are repeatable
+        self._response_cache: OrderedDict[bytes, Tuple[float, bytes]] = OrderedDict()
+
+        # Requests wait here rather than piling up on the connection pool;
+        # HTTP/2 multiplexes the admitted ones over a handful of connections
+        self._request_slots = asyncio.Semaphore(self.config.max_concurrency)
+        self._rate_limiter = _RateLimiter(
+            self.config.max_requests_per_minute,
+            self.config.max_tokens_per_minute
         )
 
+        # Cap concurrent health probes against the API host
+        self._probe_semaphore = asyncio.Semaphore(8)
+
     async def close(self):
-        """Close the HTTP client"""
-        await self.client.aclose()
+        """Close the HTTP client, unless it was passed in"""
+        if self._owns_client:
+            await self.client.aclose()
 
     async def health_check(self) -> Dict[str, Any]:
         """
@@ -70,27 +256,61 @@ class ScoutLLMService:
                 "message": "Scout LLM API credentials not configured"
             }
 
+        # Goes through the shared pooled client (auth header included); only
+        # the timeout is overridden per request in _probe
+        result = await self._probe(self._health_url)
+        if result["status"] == "healthy":
+            result["model"] = self.config.model
+        return result
+
+    async def probe_endpoints(self, urls: List[str]) -> List[Dict[str, Any]]:
+        """
+        Probe several health endpoints concurrently
+
+        Args:
+            urls: Health check URLs to probe
+
+        Returns:
+            One status dict per URL, in the same order
+        """
+        results = await asyncio.gather(
+            *(self._probe(url) for url in urls), return_exceptions=True
+        )
+        return [
+            r if isinstance(r, dict) else {
+                "status": "error",
+                "message": f"Health check failed: {str(r)}"
+            }
+            for r in results
+        ]
+
+    async def _probe(self, url: str) -> Dict[str, Any]:
+        """
+        GET a health endpoint with a hard deadline
+
+        Args:
+            url: Health check URL
+
+        Returns:
+            Status dict; timeouts are reported as "unreachable"
+        """
+        timeout = self.config.health_timeout
         try:
-            # Try a simple health check or minimal request
-            # This is a placeholder - adjust based on actual Scout API
-            # Use a short timeout for health checks to avoid hanging
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(
-                    f"{self.config.api_url}/health",
-                    headers={"Authorization": f"Bearer {self.config.access_token}"}
+            async with self._probe_semaphore:
+                # Use a short timeout for health checks to avoid hanging;
+                # wait_for also bounds time spent waiting on the pool
+                response = await asyncio.wait_for(
+                    self.client.get(url, timeout=timeout), timeout=timeout
                 )
 
-                if response.status_code == 200:
-                    return {
-                        "status": "healthy",
-                        "model": self.config.model
-                    }
-                else:
-                    return {
-                        "status": "error",
-                        "message": f"API returned status {response.status_code}"
-                    }
-        except (httpx.ConnectError, httpx.TimeoutException):
+            if response.status_code == 200:
+                return {"status": "healthy"}
+            else:
+                return {
+                    "status": "error",
+                    "message": f"API returned status {response.status_code}"
+                }
+        except (httpx.ConnectError, httpx.TimeoutException, asyncio.TimeoutError):
             return {
                 "status": "unreachable",
                 "message": "Cannot connect to Scout LLM API"
@@ -103,15 +323,21 @@ class ScoutLLMService:
 
     async def chat_completion(
         self,
-        messages: List[LLMMessage],
+        messages: List[Union[LLMMessage, Dict[str, str]]],
         temperature: float = 0.7,
         max_tokens: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Send a chat completion request to Scout LLM
 
+        Identical requests issued concurrently are coalesced into a single
+        HTTP call, and every caller receives the same response dict.
+        Responses at temperature <= 0.05 are also cached for ten minutes, so
+        repeating such a request returns the earlier (shared) response dict.
+
         Args:
-            messages: List of conversation messages
+            messages: List of conversation messages, as LLMMessage or
+                already-serialized {"role", "content"} dicts
             temperature: Controls randomness (0.0 to 1.0)
             max_tokens: Maximum tokens in response
 
@@ -125,43 +351,265 @@ class ScoutLLMService:
         # This structure may need adjustment based on actual Scout API spec
         payload = {
             "model": self.config.model,
-            "messages": [msg.model_dump() for msg in messages],
+            "messages": _truncate_messages(messages, self.config.max_context_tokens),
             "temperature": temperature,
         }
 
         if max_tokens:
             payload["max_tokens"] = max_tokens
 
-        try:
-            # Scout API endpoint (singular 'completion' not 'completions')
-            url = f"{self.config.api_url}/api/chat/completion"
-            print(f">>> LLM Request: POST {url}")
-            print(f">>> LLM Payload: {payload}")
+        return await self._complete(payload, temperature)
 
-            response = await self.client.post(url, json=payload)
+    async def _complete(self, payload: Dict[str, Any], temperature: float) -> Dict[str, Any]:
+        """
+        Send a prepared payload, via the response cache and in-flight map
 
-            print(f">>> LLM Response Status: {response.status_code}")
-            print(f">>> LLM Response Headers: {dict(response.headers)}")
+        Args:
+            payload: Complete chat completion request payload
+            temperature: The payload's temperature, to decide cacheability
 
-            response_text = response.text
-            print(f">>> LLM Response Body Length: {len(response_text)}")
-            print(f">>> LLM Response Body: {response_text[:1000]}")  # First 1000 chars
+        Returns:
+            Dict containing the response from the LLM
+        """
+        # Serialize once with sorted keys: the bytes are both the request
+        # body and the key used to coalesce identical in-flight requests
+        body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+
+        cache_key = None
+        if temperature <= _CACHE_MAX_TEMPERATURE:
+            cache_key = hashlib.blake2b(body, digest_size=16).digest()
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                expires, content = cached
+                if expires > time.monotonic():
+                    self._response_cache.move_to_end(cache_key)
+                    return orjson.loads(content)
+                del self._response_cache[cache_key]
+
+        task = self._inflight.get(body)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._send_chat_request(body, payload.get("max_tokens"))
+            )
+            self._inflight[body] = task
+            task.add_done_callback(lambda t: self._finish_inflight(body, t))
+
+        # Shield so one caller being cancelled doesn't cancel the shared request
+        content = await asyncio.shield(task)
+
+        # Responses are shared and cached as raw bytes, and every caller
+        # decodes its own copy, so no caller can change another's response
+        try:
+            response = orjson.loads(content)
+        except orjson.JSONDecodeError as e:
+            logger.error("LLM Response Not JSON: %s", e)
+            raise Exception(f"Failed to complete chat request: {str(e)}")
 
-            response.raise_for_status()
+        if cache_key is not None:
+            self._response_cache[cache_key] = (time.monotonic() + _CACHE_TTL, content)
+            if len(self._response_cache) > _CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+        return response
+
+    def _finish_inflight(self, key: bytes, task: asyncio.Task) -> None:
+        """Drop a completed request from the in-flight map."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away
+            task.exception()
+
+    async def _throttle(self, body: bytes, max_tokens: Optional[int]) -> None:
+        """Wait for room in the per-minute budgets, if any are configured."""
+        if self._rate_limiter.enabled:
+            # Rough estimate: ~4 bytes of prompt JSON per token, plus the
+            # completion budget
+            tokens = len(body) // 4 + (max_tokens or _DEFAULT_COMPLETION_TOKENS)
+            await self._rate_limiter.acquire(tokens)
+
+    async def _send_chat_request(
+        self, body: bytes, max_tokens: Optional[int] = None
+    ) -> bytes:
+        """
+        POST a chat completion payload to Scout LLM
+
+        Args:
+            body: JSON-encoded request body
+            max_tokens: The payload's completion limit, for rate limiting
 
-            if not response_text:
+        Returns:
+            The raw (JSON) response body
+        """
+        try:
+            content = await self._fetch_with_retry(body, max_tokens)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                # Slice the bytes before decoding so no full-body str is built
+                logger.debug("LLM Response Body Length: %d", len(content))
+                logger.debug(
+                    "LLM Response Body: %s",
+                    content[:1000].decode("utf-8", errors="replace")
+                )
+
+            if not content:
                 raise Exception("Empty response body from Scout LLM API")
 
-            return response.json()
+            return content
 
         except httpx.HTTPStatusError as e:
-            logger.error(f"LLM HTTP Error: Status {e.response.status_code}")
-            logger.error(f"LLM Error Response: {e.response.text}")
-            raise Exception(f"Scout LLM API error: {e.response.status_code} - {e.response.text}")
+            detail = e.response.text
+            logger.error("LLM HTTP Error: Status %s: %.1000s", e.response.status_code, detail)
+            raise Exception(f"Scout LLM API error: {e.response.status_code} - {detail}")
         except Exception as e:
-            logger.error(f"LLM Request Failed: {type(e).__name__}: {str(e)}")
+            logger.error("LLM Request Failed: %s: %s", type(e).__name__, e)
             raise Exception(f"Failed to complete chat request: {str(e)}")
 
+    async def _fetch_with_retry(self, body: bytes, max_tokens: Optional[int]) -> bytes:
+        """
+        POST a chat payload, retrying transient failures with backoff
+
+        Connection errors and 429/502/503/504 responses are retried up to
+        _RETRY_ATTEMPTS times in total, waiting exponentially longer (with
+        jitter) between attempts, or for the server's Retry-After if given.
+
+        Args:
+            body: JSON-encoded request body
+            max_tokens: The payload's completion limit, for rate limiting
+
+        Returns:
+            The raw response body
+        """
+        for attempt in range(1, _RETRY_ATTEMPTS + 1):
+            try:
+                return await self._fetch(body, max_tokens)
+            except httpx.HTTPStatusError as e:
+                if attempt == _RETRY_ATTEMPTS or e.response.status_code not in _RETRY_STATUSES:
+                    raise
+                delay = _retry_delay(attempt, e.response.headers.get("Retry-After"))
+                reason = f"status {e.response.status_code}"
+            except httpx.TransportError as e:
+                if attempt == _RETRY_ATTEMPTS:
+                    raise
+                delay = _retry_delay(attempt)
+                reason = type(e).__name__
+
+            logger.warning(
+                "LLM request failed (%s), retrying in %.2fs (attempt %d of %d)",
+                reason, delay, attempt + 1, _RETRY_ATTEMPTS
+            )
+            await asyncio.sleep(delay)
+
+        raise AssertionError("unreachable")
+
+    async def _fetch(self, body: bytes, max_tokens: Optional[int]) -> bytes:
+        """
+        POST a chat payload once and read the whole response body
+
+        Args:
+            body: JSON-encoded request body
+            max_tokens: The payload's completion limit, for rate limiting
+
+        Returns:
+            The raw response body
+        """
+        await self._throttle(body, max_tokens)
+        async with self._request_slots:
+            # Stream the body in chunks so the event loop can interleave
+            # other work while a large completion arrives
+            async with self.client.stream("POST", self._chat_url, content=body) as response:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("LLM Request: POST %s (%d bytes)", self._chat_url, len(body))
+                    logger.debug("LLM Response Status: %s", response.status_code)
+                    # Raw header tuples, no dict copy
+                    logger.debug("LLM Response Headers: %s", response.headers.raw)
+
+                if response.is_error:
+                    # Buffer the error body so it can be reported
+                    await response.aread()
+                response.raise_for_status()
+
+                return b"".join([
+                    chunk async for chunk in response.aiter_bytes(_CHUNK_SIZE)
+                ])
+
+    async def chat_completion_stream(
+        self,
+        messages: List[Union[LLMMessage, Dict[str, str]]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion from Scout LLM as it is generated
+
+        Requests a server-sent-events response and yields each text delta as
+        soon as its frame arrives. Streamed requests are not coalesced or
+        cached.
+
+        Args:
+            messages: List of conversation messages, as LLMMessage or
+                already-serialized {"role", "content"} dicts
+            temperature: Controls randomness (0.0 to 1.0)
+            max_tokens: Maximum tokens in response
+
+        Yields:
+            Pieces of generated text, in order
+        """
+        if not self.config.is_configured():
+            raise ValueError("Scout LLM API is not configured")
+
+        payload = {
+            "model": self.config.model,
+            "messages": _truncate_messages(messages, self.config.max_context_tokens),
+            "temperature": temperature,
+            "stream": True,
+        }
+
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+
+        body = orjson.dumps(payload)
+        try:
+            await self._throttle(body, max_tokens)
+            async with self._request_slots:
+                async with self.client.stream("POST", self._chat_url, content=body) as response:
+                    if response.is_error:
+                        await response.aread()
+                    response.raise_for_status()
+
+                    content_type = response.headers.get("content-type", "")
+                    if content_type.startswith("application/json"):
+                        # The server ignored "stream" and sent one completion
+                        completion = orjson.loads(await response.aread())
+                        _raise_for_error(completion)
+                        text = _extract_text(completion)
+                        if text:
+                            yield text
+                        return
+
+                    async for line in response.aiter_lines():
+                        # SSE frames look like "data: {...}"; skip blank
+                        # separators, ":" keep-alives and other SSE fields
+                        if not line.startswith("data:"):
+                            if line and not line.startswith(_SSE_IGNORED_PREFIXES):
+                                logger.warning("Ignoring non-SSE line in LLM stream: %.200s", line)
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        frame = orjson.loads(data)
+                        _raise_for_error(frame)
+                        text = _delta_text(frame)
+                        if text:
+                            yield text
+
+        except httpx.HTTPStatusError as e:
+            detail = e.response.text
+            logger.error("LLM HTTP Error: Status %s: %.1000s", e.response.status_code, detail)
+            raise Exception(f"Scout LLM API error: {e.response.status_code} - {detail}")
+        except httpx.HTTPError as e:
+            logger.error("LLM Stream Failed: %s: %s", type(e).__name__, e)
+            raise Exception(f"Failed to stream chat request: {str(e)}")
+
     async def generate_text(
         self,
         prompt: str,
@@ -181,49 +629,265 @@ class ScoutLLMService:
         Returns:
             Generated text string
         """
-        messages = []
-
-        if system_prompt:
-            messages.append(LLMMessage(role="system", content=system_prompt))
-
-        messages.append(LLMMessage(role="user", content=prompt))
-
-        response = await self.chat_completion(
-            messages=messages,
+        return await self.generate_text_fast(
+            prompt,
+            system=system_prompt,
             temperature=temperature,
             max_tokens=max_tokens
         )
 
-        # Extract the generated text from response
-        # Scout API uses "messages" array, not "choices" like OpenAI
-        try:
-            # Scout API format: {"messages": [{"content": "...", "role": "assistant"}]}
-            if "messages" in response and len(response["messages"]) > 0:
-                return response["messages"][0]["content"]
-            # Fallback to OpenAI format if needed
-            elif "choices" in response and len(response["choices"]) > 0:
-                return response["choices"][0]["message"]["content"]
-            else:
-                raise Exception(f"Unexpected response structure: {response}")
-        except (KeyError, IndexError) as e:
-            raise Exception(f"Unexpected response format from Scout LLM: {e}")
+    async def generate_text_fast(
+        self,
+        prompt: str,
+        *,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Generate text for a single prompt, building the payload directly
 
+        Skips the generic message handling of chat_completion since the
+        shape of the request is known up front.
 
-# Global service instance
-_llm_service: Optional[ScoutLLMService] = None
+        Args:
+            prompt: The user prompt
+            system: Optional system prompt to set context
+            temperature: Controls randomness
+            max_tokens: Maximum tokens in response
 
+        Returns:
+            Generated text string
+        """
+        if not self.config.is_configured():
+            raise ValueError("Scout LLM API is not configured")
 
-def get_llm_service() -> ScoutLLMService:
-    """Get or create the global LLM service instance"""
-    global _llm_service
-    if _llm_service is None:
-        _llm_service = ScoutLLMService()
-    return _llm_service
+        user = {"role": "user", "content": prompt}
+        payload: Dict[str, Any] = {
+            "model": self.config.model,
+            "messages": [_system_message(system), user] if system else [user],
+            "temperature": temperature,
+        }
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
 
+        response = await self._complete(payload, temperature)
+        return _extract_text(response)
+
+    async def generate_text_many(
+        self,
+        prompts: List[str],
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> List[str]:
+        """
+        Generate text for several prompts with a single request
+
+        The prompts are numbered into one user message and the model is asked
+        for a JSON array of answers. If the reply isn't an array with one
+        string per prompt, the prompts are sent individually and concurrently.
+
+        Args:
+            prompts: The user prompts
+            system_prompt: Optional system prompt to set context
+            temperature: Controls randomness
+            max_tokens: Maximum tokens in the combined response
+
+        Returns:
+            Generated text for each prompt, in the same order
+        """
+        if len(prompts) < 2:
+            return [
+                await self.generate_text_fast(
+                    p, system=system_prompt, temperature=temperature, max_tokens=max_tokens
+                )
+                for p in prompts
+            ]
 
-async def close_llm_service():
-    """Close the global LLM service instance"""
-    global _llm_service
-    if _llm_service is not None:
-        await _llm_service.close()
-        _llm_service = None
+        numbered = "\n\n".join(
+            f"### Prompt {i}\n{prompt}" for i, prompt in enumerate(prompts, 1)
+        )
+        batch_prompt = (
+            f"Answer each of the following {len(prompts)} prompts independently. "
+            f"Respond with only a JSON array of {len(prompts)} strings, "
+            f"one answer per prompt, in order.\n\n{numbered}"
+        )
+
+        try:
+            text = await self.generate_text_fast(
+                batch_prompt, system=system_prompt, temperature=temperature, max_tokens=max_tokens
+            )
+            answers = orjson.loads(text[text.index("["):text.rindex("]") + 1])
+            if (
+                isinstance(answers, list)
+                and len(answers) == len(prompts)
+                and all(isinstance(a, str) for a in answers)
+            ):
+                return answers
+        except ValueError:
+            # No bracketed array in the reply, or it isn't valid JSON
+            pass
+
+        logger.info("Batched generation unusable, sending %d prompts individually", len(prompts))
+        return list(await asyncio.gather(*(
+            self.generate_text_fast(
+                p, system=system_prompt, temperature=temperature, max_tokens=max_tokens
+            )
+            for p in prompts
+        )))
+
+    async def generate_text_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text for a single prompt
+
+        Args:
+            prompt: The user prompt
+            system_prompt: Optional system prompt to set context
+            temperature: Controls randomness
+            max_tokens: Maximum tokens in response
+
+        Yields:
+            Pieces of generated text, in order
+        """
+        messages = [{"role": "user", "content": prompt}]
+        if system_prompt:
+            messages.insert(0, _system_message(system_prompt))
+
+        # Close the request stream (and free its request slot) as soon as the
+        # caller stops reading, rather than whenever this generator is collected
+        async with aclosing(self.chat_completion_stream(
+            messages, temperature=temperature, max_tokens=max_tokens
+        )) as chunks:
+            async for text in chunks:
+                yield text
+
+
+def _extract_text(response: Dict[str, Any]) -> str:
+    """
+    Extract the generated text from a chat completion response
+
+    Args:
+        response: Decoded response from the LLM
+
+    Returns:
+        Generated text string
+    """
+    # Scout API uses "messages" array, not "choices" like OpenAI
+    try:
+        # Scout API format: {"messages": [{"content": "...", "role": "assistant"}]}
+        if "messages" in response and len(response["messages"]) > 0:
+            return response["messages"][0]["content"]
+        # Fallback to OpenAI format if needed
+        elif "choices" in response and len(response["choices"]) > 0:
+            return response["choices"][0]["message"]["content"]
+        else:
+            raise Exception(f"Unexpected response structure: {response}")
+    except (KeyError, IndexError) as e:
+        raise Exception(f"Unexpected response format from Scout LLM: {e}")
+
+
+def _truncate_messages(
+    messages: List[Union[LLMMessage, Dict[str, str]]],
+    max_tokens: int
+) -> List[Union[LLMMessage, Dict[str, str]]]:
+    """
+    Drop the oldest conversation turns that don't fit the context budget
+
+    Leading system messages and the latest message are always kept; the
+    remaining turns are kept newest-first while the estimated size (about
+    4 characters per token) fits in `max_tokens`.
+
+    Args:
+        messages: Conversation messages, oldest first
+        max_tokens: Estimated token budget, or 0 for no limit
+
+    Returns:
+        The messages to send, oldest first (the input list if nothing is cut)
+    """
+    def field(msg, name: str) -> str:
+        return msg[name] if isinstance(msg, dict) else getattr(msg, name)
+
+    def estimate(msg) -> int:
+        return len(field(msg, "content")) // 4
+
+    if not max_tokens or sum(estimate(m) for m in messages) <= max_tokens:
+        return messages
+
+    head = 0
+    while head < len(messages) - 1 and field(messages[head], "role") == "system":
+        head += 1
+
+    budget = max_tokens - sum(estimate(m) for m in messages[:head])
+    tail_start = len(messages) - 1
+    budget -= estimate(messages[tail_start])
+    while tail_start > head and estimate(messages[tail_start - 1]) <= budget:
+        tail_start -= 1
+        budget -= estimate(messages[tail_start])
+
+    return messages[:head] + messages[tail_start:]
+
+
+def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Seconds to wait before retrying after a failed attempt
+
+    Args:
+        attempt: The attempt that just failed (1-based)
+        retry_after: The response's Retry-After header, if any
+
+    Returns:
+        The server's Retry-After (in seconds) if valid, else exponential
+        backoff with jitter; capped at _RETRY_MAX_DELAY either way
+    """
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), _RETRY_MAX_DELAY)
+        except ValueError:
+            pass  # HTTP-date form; fall back to backoff
+    delay = _RETRY_BASE_DELAY * 2 ** (attempt - 1) + random.uniform(0, _RETRY_BASE_DELAY)
+    return min(delay, _RETRY_MAX_DELAY)
+
+
+def _raise_for_error(payload: Any) -> None:
+    """
+    Raise if a decoded response body or stream frame reports an error
+
+    Args:
+        payload: Decoded response body or SSE data frame
+
+    Raises:
+        Exception: If the payload carries an "error" object
+    """
+    if isinstance(payload, dict) and payload.get("error"):
+        error = payload["error"]
+        if isinstance(error, dict):
+            error = error.get("message") or error
+        raise Exception(f"Scout LLM API error: {error}")
+
+
+def _delta_text(frame: Dict[str, Any]) -> str:
+    """
+    Extract the text delta from one streamed response frame
+
+    Args:
+        frame: Decoded SSE data frame
+
+    Returns:
+        The frame's text, or "" if it carries none
+    """
+    # OpenAI-style streaming: {"choices": [{"delta": {"content": "..."}}]}
+    choices = frame.get("choices")
+    if choices:
+        return choices[0].get("delta", {}).get("content") or ""
+    # Scout format: {"messages": [{"content": "...", "role": "assistant"}]}
+    messages = frame.get("messages")
+    if messages:
+        return messages[0].get("content") or ""
+    return ""
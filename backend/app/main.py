@@ -5,12 +5,22 @@ Main FastAPI application entry point
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from contextlib import asynccontextmanager
 from pathlib import Path
+import asyncio
+import logging
 from .db import init_db, close_db
-from .llm import close_llm_service, get_llm_service
+from .llm import ScoutLLMService
 from .routes import game
+from .services.adventures import warm_adventure_cache
+from .services.command_parser import CommandParser
+from .services.game_state import GameStateManager
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on how long startup waits to warm the LLM connection
+LLM_WARMUP_TIMEOUT = 3.0
 
 
 @asynccontextmanager
@@ -22,13 +32,35 @@ async def lifespan(app: FastAPI):
     # Run migrations
     from .migrations.manager import MigrationManager
     from .db import get_db
-    manager = MigrationManager(get_db())
+    app.state.db = get_db()
+    app.state.game_state_manager = GameStateManager(app.state.db)
+    manager = MigrationManager(app.state.db)
     manager.load_migration_files()
     manager.migrate()
 
+    # Parse adventures now so the first command doesn't pay for it
+    warm_adventure_cache(app.state.db)
+
+    # Create the shared LLM client and prime a pooled connection (TCP/TLS)
+    # so the first player command doesn't pay the handshake
+    app.state.llm_service = ScoutLLMService()
+    # One parser per process, so its parse cache outlives each request, and
+    # seeded with the parses stored by earlier runs
+    app.state.command_parser = CommandParser(app.state.llm_service, app.state.db)
+    app.state.command_parser.load_stored_parses()
+    try:
+        llm_status = await asyncio.wait_for(
+            app.state.llm_service.health_check(), timeout=LLM_WARMUP_TIMEOUT
+        )
+        if llm_status["status"] not in ("healthy", "not_configured"):
+            logger.warning("Scout LLM warm-up: %s", llm_status.get("message"))
+    except asyncio.TimeoutError:
+        # Don't hold up startup; the first request will connect instead
+        logger.warning("Scout LLM warm-up timed out after %.0fs", LLM_WARMUP_TIMEOUT)
+
     yield
     # Shutdown
-    await close_llm_service()
+    await app.state.llm_service.close()
     close_db()
 
 
@@ -36,7 +68,9 @@ app = FastAPI(
     title="Zaik API",
     description="Backend API for Zaik text adventure game",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson is already a dependency; it encodes responses much faster than json.dumps
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS for frontend communication
@@ -65,7 +99,7 @@ async def root():
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint with LLM service status"""
-    # llm_service = get_llm_service()
+    # llm_service = app.state.llm_service
     # llm_status = await llm_service.health_check()
 
     return {
@@ -6,11 +6,50 @@ and allows for forward migrations.
 """
 
 from pathlib import Path
-from typing import List, Callable
-from datetime import datetime
+from typing import Dict, Iterable, List, Callable, Optional, Set, Tuple
+from datetime import datetime, timezone
+from itertools import islice
 import importlib.util
+import os
 import sys
-from tinydb import TinyDB
+from tinydb import TinyDB, Query
+
+from ..db import storage_batch
+from ..services.adventures import clear_adventure_cache
+
+
+# Loaded `up` functions keyed by (path, mtime_ns, size), so unchanged
+# migration files are only imported once per process
+_module_cache: Dict[Tuple[str, int, int], Optional[Callable[[TinyDB], None]]] = {}
+
+_MIGRATION_Q = Query()
+
+
+def bulk_insert(db: TinyDB, table_name: str, records: Iterable[dict], chunk_size: int = 1000) -> int:
+    """
+    Insert many documents from a migration with one write per chunk.
+
+    Calling `table.insert()` in a loop makes TinyDB write the storage once per
+    document; this uses `insert_multiple()` instead. Inside `migrate()` the
+    whole run is batched anyway, so chunking mainly bounds how many records
+    are held in memory when `records` is a generator.
+
+    Args:
+        db: TinyDB instance passed to the migration's `up` function
+        table_name: Table to insert into
+        records: Documents to insert
+        chunk_size: Number of documents written per insert_multiple() call
+
+    Returns:
+        Number of documents inserted
+    """
+    table = db.table(table_name)
+    it = iter(records)
+    count = 0
+    while chunk := list(islice(it, chunk_size)):
+        table.insert_multiple(chunk)
+        count += len(chunk)
+    return count
 
 
 class Migration:
@@ -47,6 +86,7 @@ class MigrationManager:
         self.db = db
         self.migrations_dir = migrations_dir or Path(__file__).parent
         self.migrations: List[Migration] = []
+        self._loaded_files: Set[str] = set()
 
     def register_migration(self, version: str, name: str, up: Callable[[TinyDB], None]):
         """
@@ -67,19 +107,15 @@ class MigrationManager:
     def _is_applied(self, version: str) -> bool:
         """Check if a migration version has been applied."""
         migrations_table = self._get_migrations_table()
-        from tinydb import Query
-        Migration = Query()
-        result = migrations_table.search(Migration.version == version)
-        return len(result) > 0
+        return migrations_table.contains(_MIGRATION_Q.version == version)
 
-    def _mark_applied(self, version: str, name: str):
-        """Mark a migration as applied."""
-        migrations_table = self._get_migrations_table()
-        migrations_table.insert({
+    def _applied_record(self, version: str, name: str, applied_at: str) -> dict:
+        """Build the tracking record that marks a migration as applied."""
+        return {
             'version': version,
             'name': name,
-            'applied_at': datetime.utcnow().isoformat()
-        })
+            'applied_at': applied_at
+        }
 
     def get_applied_migrations(self) -> List[dict]:
         """Get list of applied migrations."""
@@ -88,8 +124,10 @@ class MigrationManager:
 
     def get_pending_migrations(self) -> List[Migration]:
         """Get list of pending migrations."""
+        # Read the applied versions once instead of searching per migration
+        applied = {m['version'] for m in self.get_applied_migrations()}
         return [m for m in sorted(self.migrations, key=lambda x: x.version)
-                if not self._is_applied(m.version)]
+                if m.version not in applied]
 
     def migrate(self):
         """Run all pending migrations."""
@@ -99,15 +137,29 @@ class MigrationManager:
             print("No pending migrations")
             return
 
-        for migration in pending:
-            print(f"Applying migration {migration.version}: {migration.name}")
+        applied = []
+        applied_at = datetime.now(timezone.utc).isoformat()
+        with storage_batch(self.db):
             try:
-                migration.up(self.db)
-                self._mark_applied(migration.version, migration.name)
-                print(f"✓ Migration {migration.version} applied successfully")
-            except Exception as e:
-                print(f"✗ Migration {migration.version} failed: {e}")
-                raise
+                for migration in pending:
+                    print(f"Applying migration {migration.version}: {migration.name}")
+                    try:
+                        migration.up(self.db)
+                    except Exception as e:
+                        print(f"✗ Migration {migration.version} failed: {e}")
+                        raise
+                    applied.append(self._applied_record(migration.version, migration.name, applied_at))
+                    print(f"✓ Migration {migration.version} applied successfully")
+            finally:
+                # Record every migration that succeeded, even if a later one failed
+                if applied:
+                    self._get_migrations_table().insert_multiple(applied)
+                # Migrations may add or change adventures
+                clear_adventure_cache()
+
+        flush = getattr(self.db.storage, 'flush', None)
+        if flush:
+            flush()
 
     def load_migration_files(self):
         """
@@ -118,25 +170,52 @@ class MigrationManager:
 
         Each file should define an `up(db: TinyDB)` function.
         """
-        migration_files = sorted(self.migrations_dir.glob('[0-9]*.py'))
-
-        for file_path in migration_files:
-            if file_path.name.startswith('_'):
+        with os.scandir(self.migrations_dir) as it:
+            migration_files = sorted(
+                (e for e in it if e.name[:1].isdigit() and e.name.endswith('.py')),
+                key=lambda e: e.name,
+            )
+
+        for entry in migration_files:
+            # Calling this again only picks up files added since the last call
+            if entry.path in self._loaded_files:
                 continue
+            self._loaded_files.add(entry.path)
 
             # Extract version from filename
-            version = file_path.stem.split('_')[0]
-            name = '_'.join(file_path.stem.split('_')[1:])
-
-            # Load the module
-            spec = importlib.util.spec_from_file_location(f"migration_{version}", file_path)
-            if spec and spec.loader:
-                module = importlib.util.module_from_spec(spec)
-                sys.modules[f"migration_{version}"] = module
-                spec.loader.exec_module(module)
-
-                # Get the up function
-                if hasattr(module, 'up'):
-                    self.register_migration(version, name, module.up)
-                else:
-                    print(f"Warning: Migration {file_path.name} has no 'up' function")
+            version, _, name = entry.name[:-3].partition('_')
+
+            # Reuse the already-loaded module unless the file has changed;
+            # DirEntry.stat() reuses what scandir already read where it can
+            stat = entry.stat()
+            fingerprint = (entry.path, stat.st_mtime_ns, stat.st_size)
+            if fingerprint in _module_cache:
+                up = _module_cache[fingerprint]
+            else:
+                up = self._load_up(Path(entry.path), version)
+                _module_cache[fingerprint] = up
+
+            if up is not None:
+                self.register_migration(version, name, up)
+            else:
+                print(f"Warning: Migration {entry.name} has no 'up' function")
+
+    def _load_up(self, file_path: Path, version: str) -> Optional[Callable[[TinyDB], None]]:
+        """
+        Import a migration file and return its `up` function.
+
+        Args:
+            file_path: Path to the migration file
+            version: Version string used to name the module
+
+        Returns:
+            The module's `up` function, or None if it doesn't define one
+        """
+        spec = importlib.util.spec_from_file_location(f"migration_{version}", file_path)
+        if not (spec and spec.loader):
+            return None
+
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[f"migration_{version}"] = module
+        spec.loader.exec_module(module)
+        return getattr(module, 'up', None)
@@ -6,9 +6,15 @@ Player-specific state (current location, inventory, visited flags) is handled se
 in the game state manager.
 """
 
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
+import hashlib
+import re
+
+
+# Leading article in an item reference ("the sword", "a key")
+_ARTICLE_RE = re.compile(r'(?:the|an|a)\s+')
 
 
 class Exit(BaseModel):
@@ -35,6 +41,11 @@ class Exit(BaseModel):
         description="Item ID required to unlock this exit"
     )
 
+    # Content is shared through the adventure cache, so it is read-only
+    model_config = {
+        "frozen": True,
+    }
+
 
 class Item(BaseModel):
     """Represents an item that can exist in a location or player inventory."""
@@ -60,6 +71,11 @@ class Item(BaseModel):
         description="Whether the item is visible (some items may be hidden until discovered)"
     )
 
+    # Content is shared through the adventure cache, so it is read-only
+    model_config = {
+        "frozen": True,
+    }
+
 
 class Location(BaseModel):
     """
@@ -98,6 +114,86 @@ class Location(BaseModel):
         description="Location tags for categorization (e.g., 'outdoor', 'combat', 'puzzle')"
     )
 
+    # Case-folded lookups over the visible items, built once per parsed location
+    _items_by_name: Dict[str, Item] = PrivateAttr(default_factory=dict)
+    _items_by_id: Dict[str, Item] = PrivateAttr(default_factory=dict)
+    _named_items: Tuple[Tuple[str, Item], ...] = PrivateAttr(default=())
+
+    # Player-facing text derived from the static content, built once
+    _exits_text: str = PrivateAttr(default="")
+    _visible_items_text: str = PrivateAttr(default="")
+    _look_text: str = PrivateAttr(default="")
+
+    # Read-only like the rest of the adventure content; the private lookups
+    # and text above are derived from the fields and would go stale otherwise
+    model_config = {
+        "frozen": True,
+    }
+
+    def model_post_init(self, __context: Any) -> None:
+        """Index visible items and prepare the location's descriptive text."""
+        named = tuple((item.name.lower(), item) for item in self.items if item.visible)
+        # setdefault keeps the first item when several share a name or ID
+        for lower_name, item in named:
+            self._items_by_name.setdefault(lower_name, item)
+            self._items_by_id.setdefault(item.id.lower(), item)
+        self._named_items = named
+
+        self._exits_text = ", ".join(self.exits.keys())
+        self._visible_items_text = ", ".join(item.name for item in self.items if item.visible)
+
+        look_text = f"{self.name}\n\n{self.description}"
+        if self._exits_text:
+            look_text += f"\n\nVisible exits: {self._exits_text}"
+        if self._visible_items_text:
+            look_text += f"\n\nYou can see: {self._visible_items_text}"
+        self._look_text = look_text
+
+    @property
+    def exits_text(self) -> str:
+        """Comma-separated exit names (empty if there are none)."""
+        return self._exits_text
+
+    @property
+    def visible_items_text(self) -> str:
+        """Comma-separated names of the visible items (empty if there are none)."""
+        return self._visible_items_text
+
+    @property
+    def look_text(self) -> str:
+        """Full description shown on LOOK: name, description, exits and visible items."""
+        return self._look_text
+
+    def find_item(self, item_name: str) -> Optional[Item]:
+        """
+        Find a visible item by name or ID, ignoring case.
+
+        Exact name and ID matches win; otherwise the first item whose name
+        contains item_name is returned. A leading article ("the", "a", "an")
+        is ignored unless it is part of an item's name.
+
+        Args:
+            item_name: Item name, partial name, or ID to find
+
+        Returns:
+            Item if found, None otherwise
+        """
+        item_name_lower = item_name.lower()
+        item = self._items_by_name.get(item_name_lower) or self._items_by_id.get(item_name_lower)
+        if item is not None:
+            return item
+
+        article = _ARTICLE_RE.match(item_name_lower)
+        if article:
+            item_name_lower = item_name_lower[article.end():]
+            item = self._items_by_name.get(item_name_lower) or self._items_by_id.get(item_name_lower)
+            if item is not None:
+                return item
+        return next(
+            (item for lower_name, item in self._named_items if item_name_lower in lower_name),
+            None
+        )
+
 
 class Adventure(BaseModel):
     """
@@ -155,3 +251,26 @@ class Adventure(BaseModel):
         default_factory=list,
         description="Adventure tags for categorization (e.g., 'fantasy', 'horror', 'sci-fi')"
     )
+
+    # Hash of the content, computed on first use
+    _digest: Optional[str] = PrivateAttr(default=None)
+
+    # Content is shared through the adventure cache, so it is read-only
+    model_config = {
+        "frozen": True,
+    }
+
+    def content_digest(self) -> str:
+        """
+        Hash the adventure's content, so edited copies can be told apart.
+
+        Adventures are frozen, so the hash is computed once per instance.
+
+        Returns:
+            Hex digest of the serialized adventure
+        """
+        if self._digest is None:
+            self._digest = hashlib.blake2b(
+                self.model_dump_json().encode(), digest_size=16
+            ).hexdigest()
+        return self._digest
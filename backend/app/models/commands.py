@@ -9,6 +9,8 @@ from enum import Enum
 from pydantic import BaseModel, Field
 from typing import Optional
 
+from .game_session import GameSession
+
 
 class CommandType(str, Enum):
     """Types of commands that can be executed in the game."""
@@ -69,6 +71,12 @@ class GameCommand(BaseModel):
         description="Error message if command couldn't be parsed properly"
     )
 
+    # Commands are values: the parser hands out cached instances, so none
+    # may be changed in place
+    model_config = {
+        "frozen": True,
+    }
+
 
 class CommandResult(BaseModel):
     """
@@ -96,3 +104,8 @@ class CommandResult(BaseModel):
         default=False,
         description="Whether the player's inventory changed"
     )
+
+    session: Optional[GameSession] = Field(
+        default=None,
+        description="Session state after the command, so callers don't need to reload it"
+    )
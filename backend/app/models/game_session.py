@@ -5,11 +5,81 @@ This model represents player-specific game state, separate from the immutable
 adventure content. Each player's playthrough of an adventure has its own GameSession.
 """
 
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Set
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Any, Dict, List, Optional, Set
 from datetime import datetime
 
 
+# List fields kept in _TrackedList, and dict fields compared against a
+# snapshot, so changes made to them in place are still saved
+_LIST_FIELDS = ('visited_locations', 'inventory')
+_DICT_FIELDS = ('location_states', 'global_flags')
+
+
+class _TrackedList(list):
+    """
+    A list that counts the changes made to it in place.
+
+    GameSession keeps its list fields in these, so a list changed directly
+    (e.g. `session.inventory.append(...)`) instead of through the session's
+    helpers still has its lookup index rebuilt and is still saved.
+    """
+
+    __slots__ = ('version',)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.version = 0
+
+    def __setitem__(self, index, value):
+        self.version += 1
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index):
+        self.version += 1
+        super().__delitem__(index)
+
+    def __iadd__(self, other):
+        self.version += 1
+        return super().__iadd__(other)
+
+    def __imul__(self, count):
+        self.version += 1
+        return super().__imul__(count)
+
+    def append(self, value):
+        self.version += 1
+        super().append(value)
+
+    def extend(self, values):
+        self.version += 1
+        super().extend(values)
+
+    def insert(self, index, value):
+        self.version += 1
+        super().insert(index, value)
+
+    def remove(self, value):
+        self.version += 1
+        super().remove(value)
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def clear(self):
+        self.version += 1
+        super().clear()
+
+    def sort(self, **kwargs):
+        self.version += 1
+        super().sort(**kwargs)
+
+    def reverse(self):
+        self.version += 1
+        super().reverse()
+
+
 class GameSession(BaseModel):
     """
     Represents a player's game session (save file).
@@ -37,9 +107,9 @@ class GameSession(BaseModel):
         ...,
         description="Location ID where the player currently is"
     )
-    visited_locations: Set[str] = Field(
-        default_factory=set,
-        description="Set of location IDs the player has visited"
+    visited_locations: List[str] = Field(
+        default_factory=list,
+        description="Location IDs the player has visited, in the order first visited"
     )
 
     # Inventory
@@ -80,9 +150,179 @@ class GameSession(BaseModel):
         description="When this session was last played"
     )
 
+    # Lookup indexes over visited_locations and inventory, and the list
+    # versions they were built from; rebuilt when a list has changed since
+    _visited_set: Set[str] = PrivateAttr(default_factory=set)
+    _visited_version: int = PrivateAttr(default=0)
+    _inventory_set: Set[str] = PrivateAttr(default_factory=set)
+    _inventory_lower: Dict[str, str] = PrivateAttr(default_factory=dict)
+    _inventory_version: int = PrivateAttr(default=0)
+
+    # Fields changed since the session was loaded or saved; None until then,
+    # meaning the whole session has to be written
+    _dirty: Optional[Set[str]] = PrivateAttr(default=None)
+    # List versions and dict contents as of then, to catch in-place changes
+    _clean_versions: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _clean_dicts: Dict[str, Any] = PrivateAttr(default_factory=dict)
+
     model_config = {
         "json_encoders": {
             datetime: lambda v: v.isoformat(),
-            set: lambda v: list(v),  # Serialize sets as lists for JSON
         }
     }
+
+    def model_post_init(self, __context: Any) -> None:
+        """Take ownership of the list fields and build their lookup indexes."""
+        for name in _LIST_FIELDS:
+            self.__dict__[name] = _TrackedList(self.__dict__[name])
+        self._index_visited()
+        self._index_inventory()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Set an attribute, recording assignments to fields as changes."""
+        if name in _LIST_FIELDS:
+            value = _TrackedList(value)
+        super().__setattr__(name, value)
+        # Keep the lookup indexes in step with a replaced list
+        if name == 'inventory':
+            self._index_inventory()
+        elif name == 'visited_locations':
+            self._index_visited()
+        if self._dirty is not None and name in type(self).model_fields:
+            self._dirty.add(name)
+
+    def mark_dirty(self, *fields: str) -> None:
+        """
+        Record fields as changed, so they are written on the next save.
+
+        Args:
+            *fields: Names of the changed fields
+        """
+        if self._dirty is not None:
+            self._dirty.update(fields)
+
+    def mark_clean(self) -> None:
+        """Record that the session matches what is stored."""
+        self._dirty = set()
+        self._clean_versions = {name: getattr(self, name).version for name in _LIST_FIELDS}
+        self._clean_dicts = {
+            'location_states': {
+                location_id: dict(flags) for location_id, flags in self.location_states.items()
+            },
+            'global_flags': dict(self.global_flags),
+        }
+
+    @property
+    def dirty_fields(self) -> Optional[Set[str]]:
+        """Fields changed since the session was stored, or None if it never was."""
+        if self._dirty is None:
+            return None
+        dirty = set(self._dirty)
+        for name in _LIST_FIELDS:
+            if getattr(self, name).version != self._clean_versions.get(name):
+                dirty.add(name)
+        for name in _DICT_FIELDS:
+            if getattr(self, name) != self._clean_dicts.get(name):
+                dirty.add(name)
+        return dirty
+
+    def _index_visited(self) -> None:
+        """Rebuild the visited-location index from visited_locations."""
+        self._visited_set = set(self.visited_locations)
+        self._visited_version = self.visited_locations.version
+
+    def _index_inventory(self) -> None:
+        """Rebuild the inventory indexes from the inventory list."""
+        self._inventory_set = set(self.inventory)
+        self._inventory_lower = {}
+        for item_id in self.inventory:
+            # The first item wins when IDs differ only by case
+            self._inventory_lower.setdefault(item_id.lower(), item_id)
+        self._inventory_version = self.inventory.version
+
+    def _current_inventory_index(self) -> None:
+        """Rebuild the inventory indexes if the list was changed directly."""
+        if self._inventory_version != self.inventory.version:
+            self._index_inventory()
+
+    def has_visited(self, location_id: str) -> bool:
+        """
+        Check whether a location has been visited.
+
+        Args:
+            location_id: ID of the location to check
+
+        Returns:
+            True if the location is in visited_locations
+        """
+        if self._visited_version != self.visited_locations.version:
+            self._index_visited()
+        return location_id in self._visited_set
+
+    def mark_visited(self, location_id: str) -> None:
+        """
+        Record a visit to a location, keeping visited_locations free of duplicates.
+
+        Args:
+            location_id: ID of the visited location
+        """
+        if not self.has_visited(location_id):
+            self.visited_locations.append(location_id)
+            self._visited_set.add(location_id)
+            self._visited_version = self.visited_locations.version
+
+    def has_item(self, item_id: str) -> bool:
+        """
+        Check whether an item is in the inventory.
+
+        Args:
+            item_id: Exact ID of the item
+
+        Returns:
+            True if the item is in inventory
+        """
+        self._current_inventory_index()
+        return item_id in self._inventory_set
+
+    def find_inventory_item(self, name: str) -> Optional[str]:
+        """
+        Find an inventory item by ID, ignoring case, or by partial ID.
+
+        Args:
+            name: Item ID or part of one
+
+        Returns:
+            The matching item ID, or None if nothing matches
+        """
+        self._current_inventory_index()
+        name_lower = name.lower()
+        item_id = self._inventory_lower.get(name_lower)
+        if item_id is not None:
+            return item_id
+        return next((i for lower, i in self._inventory_lower.items() if name_lower in lower), None)
+
+    def add_to_inventory(self, item_id: str) -> None:
+        """
+        Add an item to the inventory unless it's already there.
+
+        Args:
+            item_id: ID of the item to add
+        """
+        if not self.has_item(item_id):
+            self.inventory.append(item_id)
+            self._inventory_set.add(item_id)
+            self._inventory_lower.setdefault(item_id.lower(), item_id)
+            self._inventory_version = self.inventory.version
+
+    def remove_from_inventory(self, item_id: str) -> None:
+        """
+        Remove an item from the inventory.
+
+        Args:
+            item_id: ID of the item to remove
+
+        Raises:
+            ValueError: If the item is not in inventory
+        """
+        self.inventory.remove(item_id)
+        self._index_inventory()
@@ -7,16 +7,19 @@ Provides endpoints for:
 - Getting current game state
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
 from typing import Optional
+from tinydb import TinyDB
+import hashlib
 
-from ..db import get_db
+from ..db import run_db
 from ..services.game_state import GameStateManager
 from ..services.command_parser import CommandParser
 from ..services.command_executor import CommandExecutor
-from ..llm import get_llm_service
-from ..models.adventure import Adventure, Location
+from ..services.adventures import get_adventure
+from ..dependencies import get_command_parser, get_database, get_game_state_manager
+from ..models import Adventure, GameSession
 
 
 router = APIRouter(prefix="/api/game", tags=["game"])
@@ -53,113 +56,117 @@ class CommandResponse(BaseModel):
 
 # ===== Helper Functions =====
 
-def _get_game_state_manager() -> GameStateManager:
-    """Get GameStateManager instance."""
-    db = get_db()
-    return GameStateManager(db)
-
+def _compose_state(session: GameSession, adventure: Optional[Adventure]) -> GameStateResponse:
+    """
+    Build the game state response from an already-loaded session and adventure.
 
-def _format_game_state(session_id: str) -> GameStateResponse:
-    """Format current game state as response."""
-    manager = _get_game_state_manager()
-    session = manager.get_session(session_id)
+    Args:
+        session: Current game session
+        adventure: Adventure being played, or None if it couldn't be found
 
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    # Get location description from adventure data
-    db = get_db()
-    from tinydb import Query
-    Adventure = Query()
-    adventures_table = db.table('adventures')
-    adventure = adventures_table.get(Adventure.id == session.adventure_id)
+    Returns:
+        GameStateResponse describing the player's current location
+    """
+    location = adventure.locations.get(session.current_location_id) if adventure else None
 
-    if not adventure:
-        message = f"You are at location: {session.current_location_id}"
+    if location:
+        message = f"{location.name}\n\n{location.description}"
     else:
-        location = adventure['locations'].get(session.current_location_id)
-        if location:
-            message = f"{location['name']}\n\n{location['description']}"
-        else:
-            message = f"You are at location: {session.current_location_id}"
+        message = f"You are at location: {session.current_location_id}"
 
     return GameStateResponse(
         session_id=session.id,
         current_location_id=session.current_location_id,
         inventory=session.inventory,
-        visited_locations=list(session.visited_locations),
+        visited_locations=session.visited_locations,
         message=message
     )
 
 
+def _state_etag(session: GameSession, adventure: Optional[Adventure]) -> str:
+    """
+    Build an ETag for a session's game state.
+
+    Every save bumps `updated_at`, so it changes whenever the session does;
+    the adventure's content hash covers edits to the location text.
+
+    Args:
+        session: Current game session
+        adventure: Adventure being played, or None if it couldn't be found
+
+    Returns:
+        Quoted ETag header value
+    """
+    adventure_digest = adventure.content_digest() if adventure else ""
+    digest = hashlib.blake2b(
+        f"{session.id}:{session.updated_at.isoformat()}:{adventure_digest}".encode(),
+        digest_size=16
+    ).hexdigest()
+    return f'"{digest}"'
+
+
 # ===== Endpoints =====
 
 @router.post("/new", response_model=GameStateResponse)
-async def new_game(request: NewGameRequest):
+async def new_game(
+    request: NewGameRequest,
+    manager: GameStateManager = Depends(get_game_state_manager),
+    db: TinyDB = Depends(get_database)
+):
     """
     Create a new game session.
 
     Creates a new game session for the specified adventure and returns
     the initial game state.
     """
-    manager = _get_game_state_manager()
-    db = get_db()
-
     # Look up the adventure
-    from tinydb import Query
-    Adventure = Query()
-    adventures_table = db.table('adventures')
-    adventure = adventures_table.get(Adventure.id == request.adventure_id)
+    adventure = await run_db(get_adventure, db, request.adventure_id)
 
     if not adventure:
         raise HTTPException(status_code=404, detail=f"Adventure '{request.adventure_id}' not found")
 
-    starting_location = adventure['starting_location_id']
+    starting_location = adventure.starting_location_id
 
-    session = manager.create_session(
+    session = await run_db(
+        manager.create_session,
         adventure_id=request.adventure_id,
         starting_location_id=starting_location,
         player_name=request.player_name
     )
 
-    return _format_game_state(session.id)
+    return _compose_state(session, adventure)
 
 
 @router.post("/{session_id}/command", response_model=CommandResponse)
-async def send_command(session_id: str, request: CommandRequest):
+async def send_command(
+    session_id: str,
+    request: CommandRequest,
+    parser: CommandParser = Depends(get_command_parser),
+    manager: GameStateManager = Depends(get_game_state_manager),
+    db: TinyDB = Depends(get_database)
+):
     """
     Send a command to the game.
 
     Processes a player command and returns the result along with
     the updated game state.
     """
-    manager = _get_game_state_manager()
-    db = get_db()
-
     # Verify session exists
-    session = manager.get_session(session_id)
+    session = await run_db(manager.get_session, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
     # Get adventure and current location for context
-    from tinydb import Query
-    Adventure_Query = Query()
-    adventures_table = db.table('adventures')
-    adventure_data = adventures_table.get(Adventure_Query.id == session.adventure_id)
+    adventure = await run_db(get_adventure, db, session.adventure_id)
 
-    if not adventure_data:
+    if not adventure:
         raise HTTPException(status_code=404, detail="Adventure not found")
 
-    adventure = Adventure(**adventure_data)
-    location_data = adventure.locations.get(session.current_location_id)
-    if not location_data:
+    location = adventure.locations.get(session.current_location_id)
+    if not location:
         raise HTTPException(status_code=404, detail="Current location not found")
 
-    location = Location(**location_data) if isinstance(location_data, dict) else location_data
-
     # Parse the command
-    llm_service = get_llm_service()
-    parser = CommandParser(llm_service)
     parsed_command = await parser.parse_command(
         player_input=request.command,
         location=location,
@@ -168,39 +175,65 @@ async def send_command(session_id: str, request: CommandRequest):
 
     # Execute the command
     executor = CommandExecutor(db)
-    result = executor.execute(parsed_command, session_id)
+    result = await run_db(executor.execute, parsed_command, session_id)
+
+    # The executor hands back the session as it left it, and the adventure
+    # is already in hand, so no reload is needed
+    session = result.session
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
 
     return CommandResponse(
         success=result.success,
         message=result.message,
-        state=_format_game_state(session_id)
+        state=_compose_state(session, adventure)
     )
 
 
 @router.get("/{session_id}/state", response_model=GameStateResponse)
-async def get_state(session_id: str):
+async def get_state(
+    session_id: str,
+    request: Request,
+    response: Response,
+    manager: GameStateManager = Depends(get_game_state_manager),
+    db: TinyDB = Depends(get_database)
+):
     """
     Get the current game state.
 
     Returns the current state of the game session without
-    processing any commands.
+    processing any commands. Responses carry an ETag, and a poll with a
+    matching If-None-Match gets an empty 304 instead of the full state.
     """
-    return _format_game_state(session_id)
+    session = await run_db(manager.get_session, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    # Served from the adventure cache, so the ETag check stays cheap
+    adventure = await run_db(get_adventure, db, session.adventure_id)
+    etag = _state_etag(session, adventure)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return _compose_state(session, adventure)
 
 
 @router.delete("/{session_id}")
-async def delete_game(session_id: str):
+async def delete_game(
+    session_id: str,
+    manager: GameStateManager = Depends(get_game_state_manager)
+):
     """
     Delete a game session.
 
     Permanently removes a game session from the database.
     """
-    manager = _get_game_state_manager()
-
     # Verify session exists before deleting
-    session = manager.get_session(session_id)
+    session = await run_db(manager.get_session, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    manager.delete_session(session_id)
+    await run_db(manager.delete_session, session_id)
     return {"message": "Session deleted successfully"}
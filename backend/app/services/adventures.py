@@ -0,0 +1,100 @@
+"""
+Adventure lookup service for Zaik.
+
+Adventures are immutable game content, so each one is read from TinyDB and
+parsed into an `Adventure` model once, then served from an in-process LRU
+cache. Anything that writes to the adventures table must call
+`clear_adventure_cache()` afterwards.
+"""
+
+from collections import OrderedDict
+from typing import Optional, Tuple
+import threading
+from tinydb import TinyDB, Query
+
+from ..db import on_reload, storage_refresh
+from ..models.adventure import Adventure, Location
+
+
+_ADVENTURE_CACHE_SIZE = 128
+
+_ADVENTURE_Q = Query()
+
+# Parsed adventures keyed by (database, adventure ID), most recently used last
+_adventure_cache: "OrderedDict[Tuple[TinyDB, str], Adventure]" = OrderedDict()
+_adventure_cache_lock = threading.Lock()
+
+
+def get_adventure(db: TinyDB, adventure_id: str) -> Optional[Adventure]:
+    """
+    Get an adventure by ID, parsing it only on the first lookup.
+
+    Args:
+        db: TinyDB instance holding the adventures table
+        adventure_id: ID of the adventure to look up
+
+    Returns:
+        The parsed Adventure, or None if no such adventure exists
+    """
+    # A cached adventure is only current if no one else wrote the file
+    storage_refresh(db)
+    key = (db, adventure_id)
+    with _adventure_cache_lock:
+        adventure = _adventure_cache.get(key)
+        if adventure is not None:
+            _adventure_cache.move_to_end(key)
+            return adventure
+
+    data = db.table('adventures').get(_ADVENTURE_Q.id == adventure_id)
+    if not data:
+        # Misses aren't cached, so an adventure added later is still found
+        return None
+
+    adventure = Adventure(**data)
+    with _adventure_cache_lock:
+        _adventure_cache[key] = adventure
+        if len(_adventure_cache) > _ADVENTURE_CACHE_SIZE:
+            _adventure_cache.popitem(last=False)
+    return adventure
+
+
+def get_location(db: TinyDB, adventure_id: str, location_id: str) -> Optional[Location]:
+    """
+    Get a location of an adventure from the cached, pre-parsed adventure.
+
+    Args:
+        db: TinyDB instance holding the adventures table
+        adventure_id: ID of the adventure the location belongs to
+        location_id: ID of the location to look up
+
+    Returns:
+        The parsed Location, or None if the adventure or location doesn't exist
+    """
+    adventure = get_adventure(db, adventure_id)
+    if adventure is None:
+        return None
+    return adventure.locations.get(location_id)
+
+
+def warm_adventure_cache(db: TinyDB) -> int:
+    """
+    Parse adventures into the cache ahead of time (called on startup).
+
+    Args:
+        db: TinyDB instance holding the adventures table
+
+    Returns:
+        Number of adventures cached
+    """
+    count = 0
+    for data in db.table('adventures').all()[:_ADVENTURE_CACHE_SIZE]:
+        if get_adventure(db, data['id']) is not None:
+            count += 1
+    return count
+
+
+@on_reload
+def clear_adventure_cache() -> None:
+    """Drop all cached adventures (call after writing to the adventures table)."""
+    with _adventure_cache_lock:
+        _adventure_cache.clear()
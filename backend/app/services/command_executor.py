@@ -4,13 +4,28 @@ Command Executor Service for Zaik.
 Executes parsed game commands and updates game state accordingly.
 """
 
-from typing import Optional
-from tinydb import TinyDB, Query
+from typing import Dict, Optional
+from tinydb import TinyDB
 
+from ..db import storage_batch
 from ..models.commands import GameCommand, CommandType, CommandResult
 from ..models.adventure import Adventure, Location, Item
 from ..models.game_session import GameSession
 from .game_state import GameStateManager
+from .adventures import get_adventure
+
+
+_HELP_TEXT = """Available commands:
+- Movement: go [direction], north, south, east, west, up, down
+- Items: take [item], drop [item], examine [item], use [item]
+- Information: look, inventory (or i)
+- Other: help
+
+You can use natural language! Try things like:
+- "pick up the candle"
+- "walk to the graveyard"
+- "check my inventory"
+"""
 
 
 class CommandExecutor:
@@ -21,6 +36,19 @@ class CommandExecutor:
     feedback messages to the player.
     """
 
+    # Handler method for each command type, built once for the class
+    _HANDLERS: Dict[CommandType, str] = {
+        CommandType.MOVE: "_execute_move",
+        CommandType.TAKE: "_execute_take",
+        CommandType.DROP: "_execute_drop",
+        CommandType.EXAMINE: "_execute_examine",
+        CommandType.USE: "_execute_use",
+        CommandType.LOOK: "_execute_look",
+        CommandType.INVENTORY: "_execute_inventory",
+        CommandType.HELP: "_execute_help",
+        CommandType.UNKNOWN: "_execute_unknown",
+    }
+
     def __init__(self, db: TinyDB):
         """
         Initialize the command executor.
@@ -33,19 +61,11 @@ class CommandExecutor:
 
     def _get_adventure(self, adventure_id: str) -> Optional[Adventure]:
         """Get adventure data from database."""
-        adventures_table = self.db.table('adventures')
-        Adventure_Query = Query()
-        adventure_data = adventures_table.get(Adventure_Query.id == adventure_id)
-        if adventure_data:
-            return Adventure(**adventure_data)
-        return None
+        return get_adventure(self.db, adventure_id)
 
     def _get_location(self, adventure: Adventure, location_id: str) -> Optional[Location]:
         """Get location from adventure."""
-        location_data = adventure.locations.get(location_id)
-        if location_data:
-            return Location(**location_data) if isinstance(location_data, dict) else location_data
-        return None
+        return adventure.locations.get(location_id)
 
     def _find_item_in_location(self, location: Location, item_name: str) -> Optional[Item]:
         """
@@ -58,15 +78,7 @@ class CommandExecutor:
         Returns:
             Item if found, None otherwise
         """
-        item_name_lower = item_name.lower()
-        for item in location.items:
-            if item.visible and (
-                item.name.lower() == item_name_lower or
-                item_name_lower in item.name.lower() or
-                item.id.lower() == item_name_lower
-            ):
-                return item
-        return None
+        return location.find_item(item_name)
 
     def execute(
         self,
@@ -91,6 +103,17 @@ class CommandExecutor:
                 message="Session not found"
             )
 
+        # Commit whatever the command writes in a single transaction
+        with storage_batch(self.db):
+            result = self._dispatch(command, session)
+        if result.session is None:
+            # Handlers that change state attach the session they saved; for
+            # everything else the session loaded above is still current
+            result.session = session
+        return result
+
+    def _dispatch(self, command: GameCommand, session: GameSession) -> CommandResult:
+        """Look up the adventure and location for a session and run the command's handler."""
         # Get adventure and location
         adventure = self._get_adventure(session.adventure_id)
         if not adventure:
@@ -107,21 +130,9 @@ class CommandExecutor:
             )
 
         # Route to appropriate handler
-        handlers = {
-            CommandType.MOVE: self._execute_move,
-            CommandType.TAKE: self._execute_take,
-            CommandType.DROP: self._execute_drop,
-            CommandType.EXAMINE: self._execute_examine,
-            CommandType.USE: self._execute_use,
-            CommandType.LOOK: self._execute_look,
-            CommandType.INVENTORY: self._execute_inventory,
-            CommandType.HELP: self._execute_help,
-            CommandType.UNKNOWN: self._execute_unknown,
-        }
-
-        handler = handlers.get(command.type)
-        if handler:
-            return handler(command, session, adventure, location)
+        handler_name = self._HANDLERS.get(command.type)
+        if handler_name:
+            return getattr(self, handler_name)(command, session, adventure, location)
 
         return CommandResult(
             success=False,
@@ -137,19 +148,17 @@ class CommandExecutor:
     ) -> CommandResult:
         """Execute a movement command."""
         if not command.target:
-            exits = ", ".join(location.exits.keys())
             return CommandResult(
                 success=False,
-                message=f"Which direction? Available exits: {exits}"
+                message=f"Which direction? Available exits: {location.exits_text}"
             )
 
         # Check if exit exists
         exit_data = location.exits.get(command.target)
         if not exit_data:
-            exits = ", ".join(location.exits.keys())
             return CommandResult(
                 success=False,
-                message=f"You can't go that way. Available exits: {exits}"
+                message=f"You can't go that way. Available exits: {location.exits_text}"
             )
 
         # Check if exit is locked
@@ -166,29 +175,20 @@ class CommandExecutor:
 
         # Move player
         target_location_id = exit_data.location_id
-        self.state_manager.move_to_location(session.id, target_location_id)
+        updated_session = self.state_manager.move_to_location(session.id, target_location_id)
 
         # Get new location for description
         new_location = self._get_location(adventure, target_location_id)
         if new_location:
-            message = f"{new_location.name}\n\n{new_location.description}"
-
-            # Add exits info
-            if new_location.exits:
-                exits = ", ".join(new_location.exits.keys())
-                message += f"\n\nVisible exits: {exits}"
-
-            # Add items info
-            visible_items = [item.name for item in new_location.items if item.visible]
-            if visible_items:
-                message += f"\n\nYou can see: {', '.join(visible_items)}"
+            message = new_location.look_text
         else:
             message = f"You go {command.target}."
 
         return CommandResult(
             success=True,
             message=message,
-            location_changed=True
+            location_changed=True,
+            session=updated_session
         )
 
     def _execute_take(
@@ -200,11 +200,10 @@ class CommandExecutor:
     ) -> CommandResult:
         """Execute a take/get command."""
         if not command.target:
-            visible_items = [item.name for item in location.items if item.visible]
-            if visible_items:
+            if location.visible_items_text:
                 return CommandResult(
                     success=False,
-                    message=f"What do you want to take? You can see: {', '.join(visible_items)}"
+                    message=f"What do you want to take? You can see: {location.visible_items_text}"
                 )
             return CommandResult(
                 success=False,
@@ -227,27 +226,27 @@ class CommandExecutor:
             )
 
         # Check if already in inventory
-        if item.id in session.inventory:
+        if session.has_item(item.id):
             return CommandResult(
                 success=False,
                 message=f"You already have the {item.name}."
             )
 
-        # Add to inventory
-        self.state_manager.add_item(session.id, item.id)
-
-        # Set location flag that item was taken
-        self.state_manager.set_location_flag(
-            session.id,
-            location.id,
-            f"item_taken_{item.id}",
-            True
-        )
+        # Add to inventory and flag that the item was taken, saved as one write
+        with self.state_manager.mutate(session.id) as updated_session:
+            self.state_manager.add_item(session.id, item.id)
+            self.state_manager.set_location_flag(
+                session.id,
+                location.id,
+                f"item_taken_{item.id}",
+                True
+            )
 
         return CommandResult(
             success=True,
             message=f"You take the {item.name}.",
-            inventory_changed=True
+            inventory_changed=True,
+            session=updated_session
         )
 
     def _execute_drop(
@@ -271,11 +270,7 @@ class CommandExecutor:
             )
 
         # Check if in inventory (fuzzy match)
-        item_id = None
-        for inv_item_id in session.inventory:
-            if command.target.lower() in inv_item_id.lower():
-                item_id = inv_item_id
-                break
+        item_id = session.find_inventory_item(command.target)
 
         if not item_id:
             return CommandResult(
@@ -284,12 +279,13 @@ class CommandExecutor:
             )
 
         # Remove from inventory
-        self.state_manager.remove_item(session.id, item_id)
+        updated_session = self.state_manager.remove_item(session.id, item_id)
 
         return CommandResult(
             success=True,
             message=f"You drop the {item_id}.",
-            inventory_changed=True
+            inventory_changed=True,
+            session=updated_session
         )
 
     def _execute_examine(
@@ -315,13 +311,13 @@ class CommandExecutor:
             )
 
         # Check inventory
-        for item_id in session.inventory:
-            if command.target.lower() in item_id.lower():
-                # TODO: Get item description from adventure data
-                return CommandResult(
-                    success=True,
-                    message=f"You examine the {item_id}."
-                )
+        item_id = session.find_inventory_item(command.target)
+        if item_id:
+            # TODO: Get item description from adventure data
+            return CommandResult(
+                success=True,
+                message=f"You examine the {item_id}."
+            )
 
         return CommandResult(
             success=False,
@@ -343,7 +339,7 @@ class CommandExecutor:
             )
 
         # Check if item is in inventory
-        if command.target not in session.inventory:
+        if not session.has_item(command.target):
             return CommandResult(
                 success=False,
                 message=f"You don't have '{command.target}'."
@@ -370,21 +366,9 @@ class CommandExecutor:
         location: Location
     ) -> CommandResult:
         """Execute a look command."""
-        message = f"{location.name}\n\n{location.description}"
-
-        # Add exits
-        if location.exits:
-            exits = ", ".join(location.exits.keys())
-            message += f"\n\nVisible exits: {exits}"
-
-        # Add visible items
-        visible_items = [item.name for item in location.items if item.visible]
-        if visible_items:
-            message += f"\n\nYou can see: {', '.join(visible_items)}"
-
         return CommandResult(
             success=True,
-            message=message
+            message=location.look_text
         )
 
     def _execute_inventory(
@@ -415,20 +399,9 @@ class CommandExecutor:
         location: Location
     ) -> CommandResult:
         """Execute a help command."""
-        help_text = """Available commands:
-- Movement: go [direction], north, south, east, west, up, down
-- Items: take [item], drop [item], examine [item], use [item]
-- Information: look, inventory (or i)
-- Other: help
-
-You can use natural language! Try things like:
-- "pick up the candle"
-- "walk to the graveyard"
-- "check my inventory"
-"""
         return CommandResult(
             success=True,
-            message=help_text
+            message=_HELP_TEXT
         )
 
     def _execute_unknown(
@@ -5,16 +5,164 @@ Converts natural language player input into structured game commands using LLM.
 Includes fallback pattern matching for when LLM is unavailable.
 """
 
-import json
+import hashlib
 import re
 import logging
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import AsyncIterator, Optional, Dict
+import orjson
+from tinydb import TinyDB
+from ..db import run_db, storage_batch
 from ..models.commands import GameCommand, CommandType
 from ..models.adventure import Location
-from ..llm import ScoutLLMService, LLMMessage
+from ..llm import ScoutLLMService
+
+try:
+    import re2 as _re_engine
+except ImportError:  # google-re2 is optional; the stdlib engine handles the same grammar
+    _re_engine = re
 
 logger = logging.getLogger(__name__)
 
+# Every fallback command form as one anchored alternation, so a single match()
+# classifies the input. Each command has an outer named group (the match's
+# lastgroup), and its targets sit in <command>_* groups nested inside it.
+# Alternatives are listed in the order they take precedence. Compiled with RE2
+# when installed, whose DFA matcher cannot backtrack catastrophically.
+_COMMAND_RE = _re_engine.compile(
+    r'^(?:'
+    r'(?P<inventory>inventory|inv|i)'
+    r'|(?P<look>look|l|look around)'
+    r'|(?P<help>help|\?)'
+    r'|(?P<move>(?:go|walk|move|head|run)\s+(?:to\s+)?(?:the\s+)?(?P<move_target>\w+))'
+    r'|(?P<direction>north|south|east|west|n|s|e|w|up|down|u|d)'
+    r'|(?P<take>(?:take|get|pick up|grab|pickup)(?:\s+(?:the\s+)?(?P<take_target>.+))?)'
+    r'|(?P<drop>(?:drop|discard|leave)\s+(?:the\s+)?(?P<drop_target>.+))'
+    r'|(?P<examine>(?:examine|inspect|look at|check|x)\s+(?:the\s+)?(?P<examine_target>.+))'
+    r'|(?P<use>use\s+(?:the\s+)?'
+    r'(?:(?P<use_target>.+?)\s+(?:on|with)\s+(?:the\s+)?(?P<use_secondary>.+)|(?P<use_item>.+)))'
+    r')$'
+)
+
+# A bare word that may name one of the location's exits
+_WORD_RE = re.compile(r'\w+')
+
+# Command type for each group that takes no target
+_SIMPLE_COMMANDS: Dict[str, CommandType] = {
+    "inventory": CommandType.INVENTORY,
+    "look": CommandType.LOOK,
+    "help": CommandType.HELP,
+}
+
+# Command type and confidence for each targeted command group
+_TARGET_COMMANDS: Dict[str, tuple[CommandType, float]] = {
+    "take": (CommandType.TAKE, 0.8),
+    "drop": (CommandType.DROP, 0.8),
+    "examine": (CommandType.EXAMINE, 0.8),
+    "use": (CommandType.USE, 0.7),
+}
+
+# Bare commands common enough to resolve before the LLM or the regexes
+_FAST_COMMANDS: Dict[str, CommandType] = {
+    **dict.fromkeys(("look", "l", "look around"), CommandType.LOOK),
+    **dict.fromkeys(("inventory", "inv", "i"), CommandType.INVENTORY),
+    **dict.fromkeys(("help", "?"), CommandType.HELP),
+}
+
+# Single-letter direction abbreviations
+_DIRECTIONS: Dict[str, str] = {
+    "n": "north", "s": "south", "e": "east", "w": "west", "u": "up", "d": "down",
+}
+
+# How many LLM parses to keep for repeated inputs in the same context
+_PARSE_CACHE_SIZE = 512
+
+# Instructions shared by every parse. They lead the system prompt so the
+# provider's automatic prefix caching can reuse them; only the per-location
+# context after them varies between calls.
+_STATIC_SYSTEM_PREFIX = """You are a command parser for a text adventure game. Your job is to convert natural language player input into structured JSON commands.
+
+Parse the player's input and return ONLY a valid JSON object with this structure:
+{
+  "type": "command_type",
+  "target": "target_name",
+  "secondary_target": null,
+  "confidence": 0.95
+}
+
+Valid command types:
+- "move": Go to a different location (target = exit direction)
+- "take": Pick up an item (target = item name)
+- "drop": Drop an item from inventory (target = item name)
+- "examine": Look at something closely (target = item or location feature)
+- "use": Use an item (target = item, secondary_target = what to use it on)
+- "look": Look around current location (no target needed)
+- "inventory": Check inventory (no target needed)
+- "help": Get help (no target needed)
+- "unknown": Could not parse command
+
+Rules:
+1. Match targets to available exits, items, or inventory items
+2. Be flexible with phrasing ("go north", "walk north", "head north" all = move north)
+3. If target is ambiguous, pick the most likely one
+4. If command makes no sense, return type "unknown"
+5. Set confidence 0.0-1.0 based on how certain you are
+6. Return ONLY valid JSON, no extra text
+
+Examples:
+"go north" → {"type": "move", "target": "north", "confidence": 1.0}
+"pick up the candle" → {"type": "take", "target": "candle", "confidence": 0.95}
+"look around" → {"type": "look", "confidence": 1.0}
+"examine altar" → {"type": "examine", "target": "altar", "confidence": 1.0}
+"asdf jkl" → {"type": "unknown", "confidence": 0.0}"""
+
+# Stored parses are tagged with the prompt they were made under, so editing
+# the instructions doesn't revive parses the new prompt might not produce
+_PROMPT_VERSION = hashlib.sha1(_STATIC_SYSTEM_PREFIX.encode()).hexdigest()[:12]
+
+async def _read_json_object(chunks: AsyncIterator[str]) -> str:
+    """
+    Pick the first top-level JSON object out of a streamed LLM reply.
+
+    A single pass tracks brace depth (ignoring braces inside JSON strings),
+    and the stream is closed as soon as the object's closing brace arrives,
+    so the reply isn't waited on past the part that gets parsed.
+
+    Args:
+        chunks: Streamed pieces of the LLM reply
+
+    Returns:
+        The JSON object's text, or the whole reply if it holds no complete object
+    """
+    parts = []
+    depth = 0
+    in_string = escaped = False
+    async with aclosing(chunks):
+        async for chunk in chunks:
+            for i, char in enumerate(chunk):
+                if in_string:
+                    if escaped:
+                        escaped = False
+                    elif char == '\\':
+                        escaped = True
+                    elif char == '"':
+                        in_string = False
+                elif char == '"' and depth:
+                    in_string = True
+                elif char == '{':
+                    depth += 1
+                elif char == '}' and depth:
+                    depth -= 1
+                    if not depth:
+                        parts.append(chunk[:i + 1])
+                        text = ''.join(parts)
+                        # Quotes outside the object aren't tracked, so it
+                        # opens at the first brace
+                        return text[text.index('{'):]
+            parts.append(chunk)
+    return ''.join(parts)
+
 
 class CommandParser:
     """
@@ -24,14 +172,82 @@ class CommandParser:
     to pattern matching when LLM is unavailable.
     """
 
-    def __init__(self, llm_service: Optional[ScoutLLMService] = None):
+    def __init__(
+        self,
+        llm_service: Optional[ScoutLLMService] = None,
+        db: Optional[TinyDB] = None
+    ):
         """
         Initialize the command parser.
 
         Args:
             llm_service: Optional LLM service for natural language parsing
+            db: Optional TinyDB instance to persist LLM parses across restarts
         """
         self.llm_service = llm_service
+        self.db = db
+        self.stored_parses = db.table('parse_cache') if db is not None else None
+
+        # LLM parses keyed by normalized input and the context the prompt was
+        # built from, so players repeating "look" or "go north" skip the call
+        self._parse_cache: OrderedDict[tuple, GameCommand] = OrderedDict()
+
+    def load_stored_parses(self) -> int:
+        """
+        Fill the parse cache with parses stored by earlier runs (called on startup).
+
+        Rows made under a different prompt or model are deleted rather than
+        loaded, as are rows from before the model was recorded.
+
+        Returns:
+            Number of parses loaded
+        """
+        if self.stored_parses is None or self.llm_service is None:
+            return 0
+
+        model = self.llm_service.config.model
+        rows = sorted(self.stored_parses.all(), key=lambda row: row.doc_id)
+        current = [
+            row for row in rows
+            if row.get('prompt') == _PROMPT_VERSION and row.get('model') == model
+        ]
+        if len(current) < len(rows):
+            current_ids = {row.doc_id for row in current}
+            with storage_batch(self.db):
+                self.stored_parses.remove(
+                    doc_ids=[row.doc_id for row in rows if row.doc_id not in current_ids]
+                )
+
+        count = 0
+        for row in current[-_PARSE_CACHE_SIZE:]:
+            key = (row['input'], row['location_id'], tuple(row['exits']), tuple(row['inventory']))
+            self._parse_cache[key] = GameCommand(raw_input=row['input'], **row['command'])
+            count += 1
+        return count
+
+    def _store_parse(self, key: tuple, command: GameCommand) -> None:
+        """
+        Persist an LLM parse, dropping the oldest stored parses past the cap.
+
+        Args:
+            key: Parse cache key (input, location ID, exits, inventory)
+            command: The parsed command
+        """
+        normalized, location_id, exits, inventory = key
+        with storage_batch(self.db):
+            self.stored_parses.insert({
+                'prompt': _PROMPT_VERSION,
+                'model': self.llm_service.config.model,
+                'input': normalized,
+                'location_id': location_id,
+                'exits': list(exits),
+                'inventory': list(inventory),
+                'command': command.model_dump(mode='json', exclude={'raw_input'}),
+            })
+            excess = len(self.stored_parses) - _PARSE_CACHE_SIZE
+            if excess > 0:
+                doc_ids = sorted(row.doc_id for row in self.stored_parses.all())
+                self.stored_parses.remove(doc_ids=doc_ids[:excess])
 
     def _build_context_prompt(
         self,
@@ -48,16 +264,11 @@ class CommandParser:
         Returns:
             Context string for the system prompt
         """
-        # Extract available exits
-        exits = list(location.exits.keys())
-
-        # Extract visible items
-        items = [item.name for item in location.items if item.visible]
-
+        # Exit and item lists are joined once per location, when it's parsed
         context = f"""Current Location: {location.name}
 
-Available Exits: {', '.join(exits) if exits else 'none'}
-Visible Items: {', '.join(items) if items else 'none'}
+Available Exits: {location.exits_text or 'none'}
+Visible Items: {location.visible_items_text or 'none'}
 Player Inventory: {', '.join(inventory) if inventory else 'empty'}"""
 
         return context
@@ -72,43 +283,7 @@ Player Inventory: {', '.join(inventory) if inventory else 'empty'}"""
         Returns:
             System prompt string
         """
-        return f"""You are a command parser for a text adventure game. Your job is to convert natural language player input into structured JSON commands.
-
-{context}
-
-Parse the player's input and return ONLY a valid JSON object with this structure:
-{{
-  "type": "command_type",
-  "target": "target_name",
-  "secondary_target": null,
-  "confidence": 0.95
-}}
-
-Valid command types:
-- "move": Go to a different location (target = exit direction)
-- "take": Pick up an item (target = item name)
-- "drop": Drop an item from inventory (target = item name)
-- "examine": Look at something closely (target = item or location feature)
-- "use": Use an item (target = item, secondary_target = what to use it on)
-- "look": Look around current location (no target needed)
-- "inventory": Check inventory (no target needed)
-- "help": Get help (no target needed)
-- "unknown": Could not parse command
-
-Rules:
-1. Match targets to available exits, items, or inventory items
-2. Be flexible with phrasing ("go north", "walk north", "head north" all = move north)
-3. If target is ambiguous, pick the most likely one
-4. If command makes no sense, return type "unknown"
-5. Set confidence 0.0-1.0 based on how certain you are
-6. Return ONLY valid JSON, no extra text
-
-Examples:
-"go north" → {{"type": "move", "target": "north", "confidence": 1.0}}
-"pick up the candle" → {{"type": "take", "target": "candle", "confidence": 0.95}}
-"look around" → {{"type": "look", "confidence": 1.0}}
-"examine altar" → {{"type": "examine", "target": "altar", "confidence": 1.0}}
-"asdf jkl" → {{"type": "unknown", "confidence": 0.0}}"""
+        return f"{_STATIC_SYSTEM_PREFIX}\n\n{context}"
 
     async def parse_command(
         self,
@@ -127,18 +302,52 @@ Examples:
         Returns:
             Parsed GameCommand
         """
+        # Bare look/inventory/help, or an exit named on its own, need no parsing
+        normalized = player_input.lower().strip()
+        command_type = _FAST_COMMANDS.get(normalized)
+        if command_type is not None:
+            return GameCommand(type=command_type, raw_input=player_input, confidence=1.0)
+        direction = _DIRECTIONS.get(normalized, normalized)
+        if direction in location.exits:
+            return GameCommand(
+                type=CommandType.MOVE,
+                target=direction,
+                raw_input=player_input,
+                confidence=1.0
+            )
+
         # Try LLM parsing first if available
         if self.llm_service and self.llm_service.config.is_configured():
+            cache_key = (
+                normalized,
+                location.id,
+                tuple(sorted(location.exits)),
+                tuple(sorted(inventory)),
+            )
+            cached = self._parse_cache.get(cache_key)
+            if cached is not None:
+                self._parse_cache.move_to_end(cache_key)
+                return cached.model_copy(update={"raw_input": player_input})
+
             try:
-                logger.info(f"Attempting LLM parse for: '{player_input}'")
-                return await self._parse_with_llm(player_input, location, inventory)
-            except Exception as e:
-                logger.error(f"LLM parsing failed: {type(e).__name__}: {e}")
-                logger.exception("Full LLM parsing exception:")
-                logger.warning("Falling back to pattern matching")
+                logger.debug("Attempting LLM parse for: %r", player_input)
+                command = await self._parse_with_llm(player_input, location, inventory)
+            except Exception:
+                logger.exception("LLM parsing failed, falling back to pattern matching")
+            else:
+                self._parse_cache[cache_key] = command
+                if len(self._parse_cache) > _PARSE_CACHE_SIZE:
+                    self._parse_cache.popitem(last=False)
+                if self.stored_parses is not None:
+                    try:
+                        await run_db(self._store_parse, cache_key, command)
+                    except Exception as e:
+                        # The parse itself succeeded; losing its stored copy is harmless
+                        logger.warning("Failed to store parse: %s", e)
+                return command
 
         # Fallback to pattern matching
-        logger.info("Using pattern matching for command parsing")
+        logger.debug("Using pattern matching for command parsing")
         return self._parse_with_patterns(player_input, location, inventory)
 
     async def _parse_with_llm(
@@ -157,39 +366,36 @@ Examples:
 
         Returns:
             Parsed GameCommand
+
+        Raises:
+            ValueError: If the reply isn't a JSON command object
         """
         context = self._build_context_prompt(location, inventory)
         system_prompt = self._get_system_prompt(context)
 
-        # Call LLM with low temperature for consistent parsing
-        response = await self.llm_service.generate_text(
+        # Call LLM with low temperature for consistent parsing, streaming the
+        # reply so it can be cut off once the command object is complete
+        response = await _read_json_object(self.llm_service.generate_text_stream(
             prompt=player_input,
             system_prompt=system_prompt,
             temperature=0.2,
             max_tokens=150
+        ))
+
+        # Any text the LLM added around the object was dropped while reading.
+        # A reply that isn't a command raises, so the caller falls back to
+        # patterns without caching the fallback as the LLM's answer
+        parsed = orjson.loads(response)
+        if not isinstance(parsed, dict):
+            raise ValueError(f"LLM reply is not a JSON object: {response!r}")
+        return GameCommand(
+            type=CommandType(parsed.get("type", "unknown")),
+            target=parsed.get("target"),
+            secondary_target=parsed.get("secondary_target"),
+            raw_input=player_input,
+            confidence=parsed.get("confidence", 0.5)
         )
 
-        # Parse JSON response
-        try:
-            # Extract JSON from response (in case LLM adds extra text)
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                parsed = json.loads(json_match.group())
-            else:
-                parsed = json.loads(response)
-
-            return GameCommand(
-                type=CommandType(parsed.get("type", "unknown")),
-                target=parsed.get("target"),
-                secondary_target=parsed.get("secondary_target"),
-                raw_input=player_input,
-                confidence=parsed.get("confidence", 0.5)
-            )
-        except (json.JSONDecodeError, ValueError) as e:
-            # If JSON parsing fails, fall back to pattern matching
-            print(f"Failed to parse LLM JSON response: {e}")
-            return self._parse_with_patterns(player_input, location, inventory)
-
     def _parse_with_patterns(
         self,
         player_input: str,
@@ -208,119 +414,54 @@ Examples:
             Parsed GameCommand
         """
         normalized = player_input.lower().strip()
+        match = _COMMAND_RE.match(normalized)
+        kind = match.lastgroup if match else None
 
-        # Inventory commands
-        if normalized in ["inventory", "i", "inv"]:
+        # Inventory, look and help commands
+        command_type = _SIMPLE_COMMANDS.get(kind)
+        if command_type is not None:
             return GameCommand(
-                type=CommandType.INVENTORY,
+                type=command_type,
                 raw_input=player_input,
                 confidence=1.0
             )
 
-        # Look commands
-        if normalized in ["look", "l", "look around"]:
+        # Movement commands only count when the exit exists here
+        if kind == "move" or kind == "direction":
+            direction = match["move_target"] or normalized
+            if direction in location.exits:
+                return GameCommand(
+                    type=CommandType.MOVE,
+                    target=direction,
+                    raw_input=player_input,
+                    confidence=1.0
+                )
+
+        # Single word might be direction
+        if normalized in location.exits and _WORD_RE.fullmatch(normalized):
             return GameCommand(
-                type=CommandType.LOOK,
+                type=CommandType.MOVE,
+                target=normalized,
                 raw_input=player_input,
-                confidence=1.0
+                confidence=0.5
             )
 
-        # Help commands
-        if normalized in ["help", "?"]:
+        # Take, drop, examine and use commands
+        targeted = _TARGET_COMMANDS.get(kind)
+        if targeted is not None:
+            command_type, confidence = targeted
+            if kind == "use":
+                target = match["use_target"] or match["use_item"]
+            else:
+                target = match[f"{kind}_target"]
             return GameCommand(
-                type=CommandType.HELP,
+                type=command_type,
+                target=target,
+                secondary_target=match["use_secondary"],
                 raw_input=player_input,
-                confidence=1.0
+                confidence=confidence
             )
 
-        # Movement commands
-        move_patterns = [
-            (r'^(?:go|walk|move|head|run)\s+(?:to\s+)?(?:the\s+)?(\w+)$', 1.0),
-            (r'^(?:north|south|east|west|n|s|e|w|up|down|u|d)$', 1.0),
-            (r'^(\w+)$', 0.5)  # Single word might be direction
-        ]
-
-        for pattern, confidence in move_patterns:
-            match = re.match(pattern, normalized)
-            if match:
-                direction = match.group(1) if match.lastindex else normalized
-                # Check if it's a valid exit
-                if direction in location.exits:
-                    return GameCommand(
-                        type=CommandType.MOVE,
-                        target=direction,
-                        raw_input=player_input,
-                        confidence=confidence
-                    )
-
-        # Take/get commands
-        take_patterns = [
-            r'^(?:take|get|pick up|grab|pickup)\s+(?:the\s+)?(.+)$',
-            r'^(?:take|get|pick up|grab|pickup)$'
-        ]
-
-        for pattern in take_patterns:
-            match = re.match(pattern, normalized)
-            if match:
-                target = match.group(1) if match.lastindex else None
-                return GameCommand(
-                    type=CommandType.TAKE,
-                    target=target,
-                    raw_input=player_input,
-                    confidence=0.8
-                )
-
-        # Drop commands
-        drop_patterns = [
-            r'^(?:drop|discard|leave)\s+(?:the\s+)?(.+)$'
-        ]
-
-        for pattern in drop_patterns:
-            match = re.match(pattern, normalized)
-            if match:
-                target = match.group(1) if match.lastindex else None
-                return GameCommand(
-                    type=CommandType.DROP,
-                    target=target,
-                    raw_input=player_input,
-                    confidence=0.8
-                )
-
-        # Examine commands
-        examine_patterns = [
-            r'^(?:examine|inspect|look at|check|x)\s+(?:the\s+)?(.+)$'
-        ]
-
-        for pattern in examine_patterns:
-            match = re.match(pattern, normalized)
-            if match:
-                target = match.group(1)
-                return GameCommand(
-                    type=CommandType.EXAMINE,
-                    target=target,
-                    raw_input=player_input,
-                    confidence=0.8
-                )
-
-        # Use commands
-        use_patterns = [
-            r'^(?:use)\s+(?:the\s+)?(.+?)\s+(?:on|with)\s+(?:the\s+)?(.+)$',
-            r'^(?:use)\s+(?:the\s+)?(.+)$'
-        ]
-
-        for pattern in use_patterns:
-            match = re.match(pattern, normalized)
-            if match:
-                target = match.group(1)
-                secondary = match.group(2) if match.lastindex >= 2 else None
-                return GameCommand(
-                    type=CommandType.USE,
-                    target=target,
-                    secondary_target=secondary,
-                    raw_input=player_input,
-                    confidence=0.7
-                )
-
         # Unknown command
         return GameCommand(
             type=CommandType.UNKNOWN,
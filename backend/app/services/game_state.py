@@ -3,16 +3,78 @@ Game State Manager service for Zaik.
 
 Manages game session state with TinyDB persistence, providing operations for
 managing player sessions, inventory, locations, and game flags.
+
+Loaded sessions are kept, as stored, in an in-process LRU cache shared by every
+manager on the same database and written through on save, so a turn reads each
+session from TinyDB at most once. Every read builds its own GameSession from
+the cached document, so callers never share one. Session writes must go
+through GameStateManager.
 """
 
-from typing import List, Optional
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 from uuid import uuid4
+import threading
 from tinydb import TinyDB, Query
 
+from ..db import on_reload, storage_refresh
 from ..models import GameSession
 
 
+_SESSION_CACHE_SIZE = 1024
+
+_SESSION_Q = Query()
+
+_TIMESTAMP_FIELDS = frozenset({'created_at', 'updated_at', 'last_played_at'})
+
+# Stored session documents keyed by (database, session ID), most recently
+# used last. They are never mutated, only replaced
+_session_cache: "OrderedDict[Tuple[TinyDB, str], dict]" = OrderedDict()
+_session_cache_lock = threading.Lock()
+
+
+def _cache_session(key: Tuple[TinyDB, str], data: dict) -> None:
+    """Put a session document in the cache, evicting the least recently used past the cap."""
+    with _session_cache_lock:
+        _session_cache[key] = data
+        _session_cache.move_to_end(key)
+        if len(_session_cache) > _SESSION_CACHE_SIZE:
+            _session_cache.popitem(last=False)
+
+
+def _load_session(data: dict) -> GameSession:
+    """
+    Build a GameSession from a stored document without re-validating it.
+
+    save_session only ever stores validated sessions, so the fields are
+    trusted; the timestamps are turned back into datetimes and the flag
+    dicts copied so the session doesn't share them with TinyDB's data or the
+    session cache (GameSession copies its lists itself).
+    """
+    fields = dict(data)
+    for name in _TIMESTAMP_FIELDS:
+        if isinstance(fields.get(name), str):
+            fields[name] = datetime.fromisoformat(fields[name])
+    if 'global_flags' in fields:
+        fields['global_flags'] = dict(fields['global_flags'])
+    if 'location_states' in fields:
+        fields['location_states'] = {
+            location_id: dict(flags) for location_id, flags in fields['location_states'].items()
+        }
+    session = GameSession.model_construct(**fields)
+    session.mark_clean()
+    return session
+
+
+@on_reload
+def clear_session_cache() -> None:
+    """Drop all cached sessions (call after writing to the sessions table directly)."""
+    with _session_cache_lock:
+        _session_cache.clear()
+
+
 class GameStateManager:
     """
     Manages game session state with TinyDB persistence.
@@ -29,8 +91,12 @@ class GameStateManager:
         Args:
             db: TinyDB instance for persistence
         """
+        self.db = db
         self.sessions = db.table('game_sessions')
-        self._query = Query()
+
+        # Session being changed and nesting depth of open mutate() blocks,
+        # per session ID
+        self._open_mutations: Dict[str, Tuple[GameSession, int]] = {}
 
     # ===== Session Management =====
 
@@ -56,7 +122,7 @@ class GameStateManager:
             adventure_id=adventure_id,
             current_location_id=starting_location_id,
             player_name=player_name,
-            visited_locations={starting_location_id}  # Start location is visited
+            visited_locations=[starting_location_id]  # Start location is visited
         )
         self.save_session(session)
         return session
@@ -71,32 +137,109 @@ class GameStateManager:
         Returns:
             GameSession if found, None otherwise
         """
-        result = self.sessions.get(self._query.id == session_id)
-        if result:
-            return GameSession(**result)
-        return None
+        # A cached document is only current if no one else wrote the file
+        storage_refresh(self.db)
+        key = (self.db, session_id)
+        with _session_cache_lock:
+            data = _session_cache.get(key)
+            if data is not None:
+                _session_cache.move_to_end(key)
+
+        if data is None:
+            result = self.sessions.get(_SESSION_Q.id == session_id)
+            if not result:
+                # Misses aren't cached, so a session created elsewhere is still found
+                return None
+            data = dict(result)
+            _cache_session(key, data)
+        return _load_session(data)
 
     def save_session(self, session: GameSession) -> None:
         """
         Save or update a game session.
 
+        A session that was loaded from (or already saved to) the database
+        only has its changed fields written; a new one is written in full.
+
         Args:
             session: GameSession to save
+
+        Raises:
+            ValueError: If a previously stored session's row no longer exists
         """
-        session.updated_at = datetime.now()
-        session.last_played_at = datetime.now()
+        now = datetime.now()
+        session.updated_at = now
+        session.last_played_at = now
+        dirty = session.dirty_fields
 
         # Convert session to dict for TinyDB storage
-        session_dict = session.model_dump()
-        # Convert set to list for JSON serialization
-        session_dict['visited_locations'] = list(session_dict['visited_locations'])
+        if dirty is None:
+            session_dict = session.model_dump()
+        else:
+            session_dict = session.model_dump(include=dirty)
         # Convert datetime objects to ISO strings for JSON serialization
-        session_dict['created_at'] = session_dict['created_at'].isoformat()
-        session_dict['updated_at'] = session_dict['updated_at'].isoformat()
-        session_dict['last_played_at'] = session_dict['last_played_at'].isoformat()
+        for name in _TIMESTAMP_FIELDS.intersection(session_dict):
+            session_dict[name] = session_dict[name].isoformat()
+
+        key = (self.db, session.id)
+        try:
+            if dirty is None:
+                # Upsert: update if exists, insert if new
+                self.sessions.upsert(session_dict, _SESSION_Q.id == session.id)
+            elif not self.sessions.update(session_dict, _SESSION_Q.id == session.id):
+                # The row is gone (deleted, or the database was reset), so
+                # there is nothing to patch the changed fields into
+                raise ValueError(f"Session {session.id} not found")
+        except Exception:
+            # Don't serve a state that never reached the database
+            with _session_cache_lock:
+                _session_cache.pop(key, None)
+            raise
+        session.mark_clean()
+
+        with _session_cache_lock:
+            cached = _session_cache.get(key)
+        if dirty is None:
+            _cache_session(key, session_dict)
+        elif cached is not None:
+            _cache_session(key, {**cached, **session_dict})
+
+    @contextmanager
+    def mutate(self, session_id: str) -> Iterator[GameSession]:
+        """
+        Load a session for several changes and save it once when the block exits.
+
+        Blocks nest, and the operations below run in one too, so every block
+        for a session gets the same GameSession and only the outermost one
+        saves it. If it raises, nothing is saved. Only changed fields are
+        written; GameSession notices its containers being changed in place.
 
-        # Upsert: update if exists, insert if new
-        self.sessions.upsert(session_dict, self._query.id == session.id)
+        Args:
+            session_id: ID of the session to change
+
+        Yields:
+            The GameSession to modify in place
+
+        Raises:
+            ValueError: If session not found
+        """
+        session, depth = self._open_mutations.get(session_id, (None, 0))
+        if session is None:
+            session = self.get_session(session_id)
+            if not session:
+                raise ValueError(f"Session {session_id} not found")
+
+        self._open_mutations[session_id] = (session, depth + 1)
+        try:
+            yield session
+        finally:
+            if depth:
+                self._open_mutations[session_id] = (session, depth)
+            else:
+                del self._open_mutations[session_id]
+
+        if not depth:
+            self.save_session(session)
 
     def delete_session(self, session_id: str) -> None:
         """
@@ -105,24 +248,33 @@ class GameStateManager:
         Args:
             session_id: ID of the session to delete
         """
-        self.sessions.remove(self._query.id == session_id)
+        with _session_cache_lock:
+            _session_cache.pop((self.db, session_id), None)
+        self.sessions.remove(_SESSION_Q.id == session_id)
 
-    def list_sessions(self, adventure_id: Optional[str] = None) -> List[GameSession]:
+    def list_sessions(
+        self,
+        adventure_id: Optional[str] = None,
+        strict: bool = False
+    ) -> List[GameSession]:
         """
         List all game sessions, optionally filtered by adventure.
 
         Args:
             adventure_id: If provided, only return sessions for this adventure
+            strict: Re-validate every stored session instead of trusting it
 
         Returns:
             List of GameSession objects
         """
         if adventure_id:
-            results = self.sessions.search(self._query.adventure_id == adventure_id)
+            results = self.sessions.search(_SESSION_Q.adventure_id == adventure_id)
         else:
             results = self.sessions.all()
 
-        return [GameSession(**result) for result in results]
+        if strict:
+            return [GameSession(**result) for result in results]
+        return [_load_session(result) for result in results]
 
     # ===== Location Operations =====
 
@@ -140,13 +292,9 @@ class GameStateManager:
         Raises:
             ValueError: If session not found
         """
-        session = self.get_session(session_id)
-        if not session:
-            raise ValueError(f"Session {session_id} not found")
-
-        session.current_location_id = location_id
-        session.visited_locations.add(location_id)
-        self.save_session(session)
+        with self.mutate(session_id) as session:
+            session.current_location_id = location_id
+            session.mark_visited(location_id)
         return session
 
     def get_current_location(self, session_id: str) -> str:
@@ -184,7 +332,7 @@ class GameStateManager:
         session = self.get_session(session_id)
         if not session:
             raise ValueError(f"Session {session_id} not found")
-        return location_id in session.visited_locations
+        return session.has_visited(location_id)
 
     # ===== Inventory Operations =====
 
@@ -202,13 +350,8 @@ class GameStateManager:
         Raises:
             ValueError: If session not found
         """
-        session = self.get_session(session_id)
-        if not session:
-            raise ValueError(f"Session {session_id} not found")
-
-        if item_id not in session.inventory:
-            session.inventory.append(item_id)
-        self.save_session(session)
+        with self.mutate(session_id) as session:
+            session.add_to_inventory(item_id)
         return session
 
     def remove_item(self, session_id: str, item_id: str) -> GameSession:
@@ -225,15 +368,10 @@ class GameStateManager:
         Raises:
             ValueError: If session not found or item not in inventory
         """
-        session = self.get_session(session_id)
-        if not session:
-            raise ValueError(f"Session {session_id} not found")
-
-        if item_id not in session.inventory:
-            raise ValueError(f"Item {item_id} not in inventory")
-
-        session.inventory.remove(item_id)
-        self.save_session(session)
+        with self.mutate(session_id) as session:
+            if not session.has_item(item_id):
+                raise ValueError(f"Item {item_id} not in inventory")
+            session.remove_from_inventory(item_id)
         return session
 
     def has_item(self, session_id: str, item_id: str) -> bool:
@@ -253,7 +391,7 @@ class GameStateManager:
         session = self.get_session(session_id)
         if not session:
             raise ValueError(f"Session {session_id} not found")
-        return item_id in session.inventory
+        return session.has_item(item_id)
 
     def get_inventory(self, session_id: str) -> List[str]:
         """
@@ -297,15 +435,10 @@ class GameStateManager:
         Raises:
             ValueError: If session not found
         """
-        session = self.get_session(session_id)
-        if not session:
-            raise ValueError(f"Session {session_id} not found")
-
-        if location_id not in session.location_states:
-            session.location_states[location_id] = {}
-
-        session.location_states[location_id][flag_name] = value
-        self.save_session(session)
+        with self.mutate(session_id) as session:
+            if location_id not in session.location_states:
+                session.location_states[location_id] = {}
+            session.location_states[location_id][flag_name] = value
         return session
 
     def get_location_flag(
@@ -354,12 +487,8 @@ class GameStateManager:
         Raises:
             ValueError: If session not found
         """
-        session = self.get_session(session_id)
-        if not session:
-            raise ValueError(f"Session {session_id} not found")
-
-        session.global_flags[flag_name] = value
-        self.save_session(session)
+        with self.mutate(session_id) as session:
+            session.global_flags[flag_name] = value
         return session
 
     def get_global_flag(self, session_id: str, flag_name: str) -> bool:
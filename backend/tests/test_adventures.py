@@ -0,0 +1,82 @@
+"""
+Tests for the adventure lookup cache
+"""
+
+import pytest
+from tinydb import TinyDB
+from tinydb.storages import MemoryStorage
+
+from app.services.adventures import (
+    get_adventure, get_location, warm_adventure_cache, clear_adventure_cache
+)
+
+
+ADVENTURE = {
+    "id": "test_adventure",
+    "name": "Test Adventure",
+    "description": "A test adventure",
+    "starting_location_id": "room1",
+    "locations": {
+        "room1": {
+            "id": "room1",
+            "name": "First Room",
+            "description": "A simple test room"
+        }
+    }
+}
+
+
+@pytest.fixture
+def db():
+    """Create an in-memory TinyDB instance for testing"""
+    clear_adventure_cache()
+    yield TinyDB(storage=MemoryStorage)
+    clear_adventure_cache()
+
+
+def test_get_adventure_parses_once(db):
+    """Repeated lookups return the same parsed Adventure"""
+    db.table('adventures').insert(ADVENTURE)
+
+    first = get_adventure(db, "test_adventure")
+    assert first is not None
+    assert first.locations["room1"].name == "First Room"
+    assert get_adventure(db, "test_adventure") is first
+
+
+def test_get_adventure_miss_not_cached(db):
+    """An adventure inserted after a failed lookup is still found"""
+    assert get_adventure(db, "test_adventure") is None
+
+    db.table('adventures').insert(ADVENTURE)
+    assert get_adventure(db, "test_adventure") is not None
+
+
+def test_clear_adventure_cache(db):
+    """Clearing the cache picks up changed adventure data"""
+    adventures = db.table('adventures')
+    adventures.insert(ADVENTURE)
+    assert get_adventure(db, "test_adventure").name == "Test Adventure"
+
+    adventures.update({"name": "Renamed"})
+    clear_adventure_cache()
+    assert get_adventure(db, "test_adventure").name == "Renamed"
+
+
+def test_get_location(db):
+    """Locations are served from the cached adventure"""
+    db.table('adventures').insert(ADVENTURE)
+
+    location = get_location(db, "test_adventure", "room1")
+    assert location is get_adventure(db, "test_adventure").locations["room1"]
+    assert get_location(db, "test_adventure", "missing") is None
+    assert get_location(db, "missing", "room1") is None
+
+
+def test_warm_adventure_cache(db):
+    """Warming parses stored adventures before the first lookup"""
+    db.table('adventures').insert(ADVENTURE)
+
+    assert warm_adventure_cache(db) == 1
+    db.table('adventures').truncate()
+    assert get_adventure(db, "test_adventure") is not None
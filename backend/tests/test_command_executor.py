@@ -3,6 +3,7 @@ Tests for Command Executor Service
 """
 
 import pytest
+from pydantic import ValidationError
 from tinydb import TinyDB
 from tinydb.storages import MemoryStorage
 
@@ -12,92 +13,101 @@ from app.models.commands import GameCommand, CommandType
 from app.models.adventure import Adventure, Location, Exit, Item
 
 
-@pytest.fixture
-def db():
-    """Create an in-memory TinyDB instance for testing"""
-    return TinyDB(storage=MemoryStorage)
-
-
-@pytest.fixture
-def sample_adventure(db):
-    """Create a sample adventure in the database"""
-    adventure = {
-        "id": "test_adventure",
-        "name": "Test Adventure",
-        "description": "A test adventure",
-        "starting_location_id": "room1",
-        "locations": {
-            "room1": {
-                "id": "room1",
-                "name": "First Room",
-                "description": "A simple test room",
-                "exits": {
-                    "north": {
-                        "direction": "north",
-                        "location_id": "room2",
-                        "description": "A door to the north",
-                        "locked": False
-                    },
-                    "east": {
-                        "direction": "east",
-                        "location_id": "locked_room",
-                        "description": "A locked door",
-                        "locked": True,
-                        "required_item": "key"
-                    }
+# Adventure document shared by every test; none of them modify it
+_ADVENTURE_DOC = {
+    "id": "test_adventure",
+    "name": "Test Adventure",
+    "description": "A test adventure",
+    "starting_location_id": "room1",
+    "locations": {
+        "room1": {
+            "id": "room1",
+            "name": "First Room",
+            "description": "A simple test room",
+            "exits": {
+                "north": {
+                    "direction": "north",
+                    "location_id": "room2",
+                    "description": "A door to the north",
+                    "locked": False
                 },
-                "items": [
-                    {
-                        "id": "sword",
-                        "name": "iron sword",
-                        "description": "A rusty iron sword",
-                        "takeable": True,
-                        "visible": True
-                    },
-                    {
-                        "id": "table",
-                        "name": "wooden table",
-                        "description": "A heavy wooden table",
-                        "takeable": False,
-                        "visible": True
-                    }
-                ]
+                "east": {
+                    "direction": "east",
+                    "location_id": "locked_room",
+                    "description": "A locked door",
+                    "locked": True,
+                    "required_item": "key"
+                }
             },
-            "room2": {
-                "id": "room2",
-                "name": "Second Room",
-                "description": "Another test room",
-                "exits": {
-                    "south": {
-                        "direction": "south",
-                        "location_id": "room1",
-                        "description": "Back to the first room",
-                        "locked": False
-                    }
+            "items": [
+                {
+                    "id": "sword",
+                    "name": "iron sword",
+                    "description": "A rusty iron sword",
+                    "takeable": True,
+                    "visible": True
                 },
-                "items": [
-                    {
-                        "id": "key",
-                        "name": "brass key",
-                        "description": "A shiny brass key",
-                        "takeable": True,
-                        "visible": True
-                    }
-                ]
+                {
+                    "id": "table",
+                    "name": "wooden table",
+                    "description": "A heavy wooden table",
+                    "takeable": False,
+                    "visible": True
+                }
+            ]
+        },
+        "room2": {
+            "id": "room2",
+            "name": "Second Room",
+            "description": "Another test room",
+            "exits": {
+                "south": {
+                    "direction": "south",
+                    "location_id": "room1",
+                    "description": "Back to the first room",
+                    "locked": False
+                }
             },
-            "locked_room": {
-                "id": "locked_room",
-                "name": "Locked Room",
-                "description": "A room behind a locked door",
-                "exits": {},
-                "items": []
-            }
+            "items": [
+                {
+                    "id": "key",
+                    "name": "brass key",
+                    "description": "A shiny brass key",
+                    "takeable": True,
+                    "visible": True
+                }
+            ]
+        },
+        "locked_room": {
+            "id": "locked_room",
+            "name": "Locked Room",
+            "description": "A room behind a locked door",
+            "exits": {},
+            "items": []
         }
     }
+}
+
+
+# Commands used by several tests; GameCommand is frozen, so they can be shared
+LOOK_CMD = GameCommand(type=CommandType.LOOK, raw_input="look")
+INVENTORY_CMD = GameCommand(type=CommandType.INVENTORY, raw_input="inventory")
+TAKE_SWORD = GameCommand(type=CommandType.TAKE, target="sword", raw_input="take sword")
+DROP_SWORD = GameCommand(type=CommandType.DROP, target="sword", raw_input="drop sword")
+USE_KEY = GameCommand(type=CommandType.USE, target="key", raw_input="use key")
+
+
+@pytest.fixture(scope="module")
+def db():
+    """Create an in-memory TinyDB instance shared by the module's tests"""
+    return TinyDB(storage=MemoryStorage)
+
 
-    adventures_table = db.table('adventures')
-    adventures_table.insert(adventure)
-    return adventure
+@pytest.fixture(scope="module")
+def sample_adventure(db):
+    """Create the sample adventure in the database"""
+    db.table('adventures').insert(_ADVENTURE_DOC)
+    return _ADVENTURE_DOC
 
 
 @pytest.fixture
@@ -106,7 +116,7 @@ def game_state_manager(db):
     return GameStateManager(db)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def executor(db):
     """Create a CommandExecutor"""
     return CommandExecutor(db)
@@ -126,12 +136,7 @@ def test_session(game_state_manager, sample_adventure):
 
 def test_execute_look(executor, test_session):
     """Test executing a look command"""
-    command = GameCommand(
-        type=CommandType.LOOK,
-        raw_input="look"
-    )
-
-    result = executor.execute(command, test_session.id)
+    result = executor.execute(LOOK_CMD, test_session.id)
 
     assert result.success is True
     assert "First Room" in result.message
@@ -144,12 +149,7 @@ def test_execute_look(executor, test_session):
 
 def test_execute_inventory_empty(executor, test_session):
     """Test executing inventory command with empty inventory"""
-    command = GameCommand(
-        type=CommandType.INVENTORY,
-        raw_input="inventory"
-    )
-
-    result = executor.execute(command, test_session.id)
+    result = executor.execute(INVENTORY_CMD, test_session.id)
 
     assert result.success is True
     assert "not carrying anything" in result.message.lower() or "aren't carrying" in result.message.lower()
@@ -161,12 +161,7 @@ def test_execute_inventory_with_items(executor, test_session, game_state_manager
     game_state_manager.add_item(test_session.id, "sword")
     game_state_manager.add_item(test_session.id, "key")
 
-    command = GameCommand(
-        type=CommandType.INVENTORY,
-        raw_input="inventory"
-    )
-
-    result = executor.execute(command, test_session.id)
+    result = executor.execute(INVENTORY_CMD, test_session.id)
 
     assert result.success is True
     assert "sword" in result.message
@@ -238,13 +233,7 @@ def test_execute_move_locked_exit(executor, test_session):
 
 def test_execute_take_valid_item(executor, test_session, game_state_manager):
     """Test taking a valid takeable item"""
-    command = GameCommand(
-        type=CommandType.TAKE,
-        target="sword",
-        raw_input="take sword"
-    )
-
-    result = executor.execute(command, test_session.id)
+    result = executor.execute(TAKE_SWORD, test_session.id)
 
     assert result.success is True
     assert result.inventory_changed is True
@@ -255,6 +244,36 @@ def test_execute_take_valid_item(executor, test_session, game_state_manager):
     assert "sword" in session.inventory
 
 
+def test_execute_take_item_with_article(executor, test_session):
+    """Test that a leading article in the target is ignored"""
+    command = GameCommand(
+        type=CommandType.TAKE,
+        target="the iron sword",
+        raw_input="take the iron sword"
+    )
+
+    result = executor.execute(command, test_session.id)
+
+    assert result.success is True
+    assert "sword" in result.session.inventory
+
+
+def test_execute_returns_session_after_command(executor, test_session):
+    """Test that results carry the session as the command left it"""
+    take = executor.execute(
+        TAKE_SWORD,
+        test_session.id
+    )
+    assert "sword" in take.session.inventory
+    assert take.session.location_states["room1"]["item_taken_sword"] is True
+
+    look = executor.execute(
+        LOOK_CMD,
+        test_session.id
+    )
+    assert look.session.inventory == ["sword"]
+
+
 def test_execute_take_untakeable_item(executor, test_session):
     """Test taking an item that cannot be taken"""
     command = GameCommand(
@@ -288,13 +307,7 @@ def test_execute_take_already_in_inventory(executor, test_session, game_state_ma
     # Add item to inventory first
     game_state_manager.add_item(test_session.id, "sword")
 
-    command = GameCommand(
-        type=CommandType.TAKE,
-        target="sword",
-        raw_input="take sword"
-    )
-
-    result = executor.execute(command, test_session.id)
+    result = executor.execute(TAKE_SWORD, test_session.id)
 
     assert result.success is False
     assert "already have" in result.message.lower()
@@ -321,13 +334,7 @@ def test_execute_drop_valid_item(executor, test_session, game_state_manager):
     # Add item to inventory first
     game_state_manager.add_item(test_session.id, "sword")
 
-    command = GameCommand(
-        type=CommandType.DROP,
-        target="sword",
-        raw_input="drop sword"
-    )
-
-    result = executor.execute(command, test_session.id)
+    result = executor.execute(DROP_SWORD, test_session.id)
 
     assert result.success is True
     assert result.inventory_changed is True
@@ -340,13 +347,7 @@ def test_execute_drop_valid_item(executor, test_session, game_state_manager):
 
 def test_execute_drop_item_not_in_inventory(executor, test_session):
     """Test dropping an item not in inventory"""
-    command = GameCommand(
-        type=CommandType.DROP,
-        target="sword",
-        raw_input="drop sword"
-    )
-
-    result = executor.execute(command, test_session.id)
+    result = executor.execute(DROP_SWORD, test_session.id)
 
     assert result.success is False
     assert "don't have" in result.message.lower()
@@ -382,6 +383,34 @@ def test_execute_examine_visible_item(executor, test_session):
     assert "rusty iron sword" in result.message.lower()
 
 
+def test_find_item_prefers_exact_match_and_skips_hidden():
+    """Test item lookup by exact name, ID and partial name"""
+    location = Location(
+        id="armory",
+        name="Armory",
+        description="Racks of weapons",
+        items=[
+            Item(id="longsword", name="iron longsword", description="A long blade"),
+            Item(id="blade", name="sword", description="A short blade"),
+            Item(id="dagger", name="hidden dagger", description="Tucked away", visible=False),
+        ]
+    )
+
+    assert location.find_item("Sword").id == "blade"
+    assert location.find_item("LONGSWORD").id == "longsword"
+    assert location.find_item("iron").id == "longsword"
+    assert location.find_item("dagger") is None
+
+
+def test_adventure_content_is_read_only():
+    """Test that locations can't be changed once their text is derived"""
+    location = Location(id="cell", name="Cell", description="A bare cell")
+
+    with pytest.raises(ValidationError):
+        location.name = "Renamed"
+    assert location.look_text.startswith("Cell")
+
+
 def test_execute_examine_inventory_item(executor, test_session, game_state_manager):
     """Test examining an item in inventory"""
     game_state_manager.add_item(test_session.id, "key")
@@ -432,13 +461,7 @@ def test_execute_use_item(executor, test_session, game_state_manager):
     """Test using an item"""
     game_state_manager.add_item(test_session.id, "key")
 
-    command = GameCommand(
-        type=CommandType.USE,
-        target="key",
-        raw_input="use key"
-    )
-
-    result = executor.execute(command, test_session.id)
+    result = executor.execute(USE_KEY, test_session.id)
 
     assert result.success is True
     assert "use" in result.message.lower()
@@ -464,13 +487,7 @@ def test_execute_use_item_on_target(executor, test_session, game_state_manager):
 
 def test_execute_use_item_not_in_inventory(executor, test_session):
     """Test using an item not in inventory"""
-    command = GameCommand(
-        type=CommandType.USE,
-        target="key",
-        raw_input="use key"
-    )
-
-    result = executor.execute(command, test_session.id)
+    result = executor.execute(USE_KEY, test_session.id)
 
     assert result.success is False
     assert "don't have" in result.message.lower()
@@ -512,12 +529,7 @@ def test_execute_unknown(executor, test_session):
 
 def test_execute_with_invalid_session(executor):
     """Test executing command with non-existent session"""
-    command = GameCommand(
-        type=CommandType.LOOK,
-        raw_input="look"
-    )
-
-    result = executor.execute(command, "invalid_session_id")
+    result = executor.execute(LOOK_CMD, "invalid_session_id")
 
     assert result.success is False
     assert "not found" in result.message.lower()
@@ -525,38 +537,21 @@ def test_execute_with_invalid_session(executor):
 
 # ===== Integration Tests =====
 
-def test_full_gameplay_scenario(executor, test_session, game_state_manager):
-    """Test a complete gameplay scenario"""
-    # Look around
-    result = executor.execute(
-        GameCommand(type=CommandType.LOOK, raw_input="look"),
-        test_session.id
-    )
-    assert result.success is True
-    assert "First Room" in result.message
+# Each step of the gameplay scenario and text its message must contain
+_SCENARIO = [
+    (LOOK_CMD, "First Room"),
+    (TAKE_SWORD, "sword"),
+    (INVENTORY_CMD, "sword"),
+    (GameCommand(type=CommandType.MOVE, target="north", raw_input="go north"), "Second Room"),
+]
 
-    # Take sword
-    result = executor.execute(
-        GameCommand(type=CommandType.TAKE, target="sword", raw_input="take sword"),
-        test_session.id
-    )
-    assert result.success is True
-
-    # Check inventory
-    result = executor.execute(
-        GameCommand(type=CommandType.INVENTORY, raw_input="inventory"),
-        test_session.id
-    )
-    assert result.success is True
-    assert "sword" in result.message
 
-    # Move north
-    result = executor.execute(
-        GameCommand(type=CommandType.MOVE, target="north", raw_input="go north"),
-        test_session.id
-    )
-    assert result.success is True
-    assert "Second Room" in result.message
+def test_full_gameplay_scenario(executor, test_session, game_state_manager):
+    """Test a complete gameplay scenario"""
+    for command, expected in _SCENARIO:
+        result = executor.execute(command, test_session.id)
+        assert result.success is True, command.raw_input
+        assert expected in result.message, command.raw_input
 
     # Verify we're in the new location
     session = game_state_manager.get_session(test_session.id)
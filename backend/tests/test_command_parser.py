@@ -2,9 +2,14 @@
 Tests for Command Parser Service
 """
 
+import httpx
+import orjson
 import pytest
-from unittest.mock import AsyncMock, MagicMock
+from types import SimpleNamespace
+from tinydb import TinyDB
+from tinydb.storages import MemoryStorage
 
+from app.llm import LLMConfig, ScoutLLMService
 from app.services.command_parser import CommandParser
 from app.models.commands import GameCommand, CommandType
 from app.models.adventure import Location, Exit, Item
@@ -34,127 +39,117 @@ def sample_inventory():
     return ["key", "torch"]
 
 
-@pytest.fixture
-def parser_no_llm():
-    """Create a CommandParser without LLM (uses fallback only)"""
-    return CommandParser(llm_service=None)
+class StubLLM:
+    """Stand-in for ScoutLLMService that streams a canned reply or raises"""
 
+    def __init__(self):
+        self.config = SimpleNamespace(is_configured=lambda: True, model="test-model")
+        self.reply = ()
+        self.error = None
+        self.calls = 0
 
-@pytest.fixture
-def parser_with_mock_llm():
-    """Create a CommandParser with mocked LLM service"""
-    mock_llm = MagicMock()
-    mock_llm.config.is_configured.return_value = True
-    return CommandParser(llm_service=mock_llm)
+    def generate_text_stream(self, *args, **kwargs):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return self._stream()
 
+    async def _stream(self):
+        for chunk in self.reply:
+            yield chunk
 
-# ===== Pattern Matching (Fallback) Tests =====
-
-@pytest.mark.asyncio
-async def test_parse_inventory_command(parser_no_llm, sample_location, sample_inventory):
-    """Test parsing inventory commands"""
-    commands = ["inventory", "i", "inv"]
-
-    for cmd in commands:
-        result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
-        assert result.type == CommandType.INVENTORY
-        assert result.confidence == 1.0
 
+@pytest.fixture(scope="module")
+def parser_no_llm():
+    """Create a CommandParser without LLM (uses fallback only)"""
+    return CommandParser(llm_service=None)
 
-@pytest.mark.asyncio
-async def test_parse_look_command(parser_no_llm, sample_location, sample_inventory):
-    """Test parsing look commands"""
-    commands = ["look", "l", "look around"]
 
-    for cmd in commands:
-        result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
-        assert result.type == CommandType.LOOK
-        assert result.confidence == 1.0
+@pytest.fixture
+def parser_with_stub_llm():
+    """Create a CommandParser with a stub LLM service"""
+    return CommandParser(llm_service=StubLLM())
 
 
-@pytest.mark.asyncio
-async def test_parse_help_command(parser_no_llm, sample_location, sample_inventory):
-    """Test parsing help commands"""
-    commands = ["help", "?"]
+# ===== Pattern Matching (Fallback) Tests =====
 
-    for cmd in commands:
-        result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
-        assert result.type == CommandType.HELP
-        assert result.confidence == 1.0
+@pytest.mark.parametrize("cmd,expected_type", [
+    ("inventory", CommandType.INVENTORY),
+    ("i", CommandType.INVENTORY),
+    ("inv", CommandType.INVENTORY),
+    ("look", CommandType.LOOK),
+    ("l", CommandType.LOOK),
+    ("look around", CommandType.LOOK),
+    ("help", CommandType.HELP),
+    ("?", CommandType.HELP),
+])
+async def test_parse_simple_commands(parser_no_llm, sample_location, sample_inventory, cmd, expected_type):
+    """Test parsing inventory, look and help commands"""
+    result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
+    assert result.type == expected_type
+    assert result.confidence == 1.0
 
 
-@pytest.mark.asyncio
-async def test_parse_movement_commands(parser_no_llm, sample_location, sample_inventory):
+@pytest.mark.parametrize("cmd,expected_target", [
+    ("go north", "north"),
+    ("walk north", "north"),
+    ("move to south", "south"),
+    ("head south", "south"),
+    ("north", "north"),
+    ("n", "north"),
+    ("e", None),  # 'east' is not in exits
+])
+async def test_parse_movement_commands(parser_no_llm, sample_location, sample_inventory, cmd, expected_target):
     """Test parsing movement commands"""
-    test_cases = [
-        ("go north", "north"),
-        ("walk north", "north"),
-        ("move to south", "south"),
-        ("head south", "south"),
-        ("north", "north"),
-        ("n", None),  # 'n' is not in exits
-    ]
-
-    for cmd, expected_target in test_cases:
-        result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
-        if expected_target:
-            assert result.type == CommandType.MOVE
-            assert result.target == expected_target
-        else:
-            # If not a valid exit, should be unknown
-            assert result.type == CommandType.UNKNOWN
+    result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
+    if expected_target:
+        assert result.type == CommandType.MOVE
+        assert result.target == expected_target
+    else:
+        # If not a valid exit, should be unknown
+        assert result.type == CommandType.UNKNOWN
 
 
-@pytest.mark.asyncio
-async def test_parse_take_commands(parser_no_llm, sample_location, sample_inventory):
+@pytest.mark.parametrize("cmd", [
+    "take the sword",
+    "get sword",
+    "pick up the sword",
+    "grab sword",
+    "pickup sword",
+])
+async def test_parse_take_commands(parser_no_llm, sample_location, sample_inventory, cmd):
     """Test parsing take/get commands"""
-    test_cases = [
-        "take the sword",
-        "get sword",
-        "pick up the sword",
-        "grab sword",
-        "pickup sword"
-    ]
-
-    for cmd in test_cases:
-        result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
-        assert result.type == CommandType.TAKE
-        assert "sword" in result.target or result.target == "sword"
+    result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
+    assert result.type == CommandType.TAKE
+    assert "sword" in result.target or result.target == "sword"
 
 
-@pytest.mark.asyncio
-async def test_parse_drop_commands(parser_no_llm, sample_location, sample_inventory):
+@pytest.mark.parametrize("cmd", [
+    "drop the key",
+    "discard torch",
+    "leave key",
+])
+async def test_parse_drop_commands(parser_no_llm, sample_location, sample_inventory, cmd):
     """Test parsing drop commands"""
-    test_cases = [
-        "drop the key",
-        "discard torch",
-        "leave key"
-    ]
-
-    for cmd in test_cases:
-        result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
-        assert result.type == CommandType.DROP
-        assert result.target in ["key", "torch", "the key"]
-
-
-@pytest.mark.asyncio
-async def test_parse_examine_commands(parser_no_llm, sample_location, sample_inventory):
+    result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
+    assert result.type == CommandType.DROP
+    assert result.target in ["key", "torch", "the key"]
+
+
+@pytest.mark.parametrize("cmd,expected_target", [
+    ("examine sword", "sword"),
+    ("inspect the table", "table"),
+    ("look at sword", "sword"),
+    ("check table", "table"),
+    ("x sword", "sword"),
+])
+async def test_parse_examine_commands(parser_no_llm, sample_location, sample_inventory, cmd, expected_target):
     """Test parsing examine commands"""
-    test_cases = [
-        ("examine sword", "sword"),
-        ("inspect the table", "table"),
-        ("look at sword", "sword"),
-        ("check table", "table"),
-        ("x sword", "sword")
-    ]
-
-    for cmd, expected_target in test_cases:
-        result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
-        assert result.type == CommandType.EXAMINE
-        assert expected_target in result.target
+    result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
+    assert result.type == CommandType.EXAMINE
+    assert expected_target in result.target
 
 
-@pytest.mark.asyncio
 async def test_parse_use_commands(parser_no_llm, sample_location, sample_inventory):
     """Test parsing use commands"""
     # Use single item
@@ -170,20 +165,17 @@ async def test_parse_use_commands(parser_no_llm, sample_location, sample_invento
     assert result.secondary_target == "door"
 
 
-@pytest.mark.asyncio
-async def test_parse_unknown_command(parser_no_llm, sample_location, sample_inventory):
+@pytest.mark.parametrize("cmd", [
+    "asdf jkl",
+    "xyzzy",
+    "blah blah blah",
+])
+async def test_parse_unknown_command(parser_no_llm, sample_location, sample_inventory, cmd):
     """Test parsing unknown/invalid commands"""
-    commands = [
-        "asdf jkl",
-        "xyzzy",
-        "blah blah blah"
-    ]
-
-    for cmd in commands:
-        result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
-        assert result.type == CommandType.UNKNOWN
-        assert result.confidence == 0.0
-        assert result.error_message is not None
+    result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
+    assert result.type == CommandType.UNKNOWN
+    assert result.confidence == 0.0
+    assert result.error_message is not None
 
 
 # ===== Context Building Tests =====
@@ -226,15 +218,12 @@ def test_build_context_prompt_empty(parser_no_llm):
 
 # ===== LLM Integration Tests =====
 
-@pytest.mark.asyncio
-async def test_parse_with_llm_success(parser_with_mock_llm, sample_location, sample_inventory):
+async def test_parse_with_llm_success(parser_with_stub_llm, sample_location, sample_inventory):
     """Test parsing with LLM when it returns valid JSON"""
     # Mock LLM to return valid command JSON
-    parser_with_mock_llm.llm_service.generate_text = AsyncMock(
-        return_value='{"type": "move", "target": "north", "confidence": 0.95}'
-    )
+    parser_with_stub_llm.llm_service.reply = ['{"type": "move", "target": "north", "confidence": 0.95}']
 
-    result = await parser_with_mock_llm.parse_command(
+    result = await parser_with_stub_llm.parse_command(
         "go to the northern door",
         sample_location,
         sample_inventory
@@ -245,15 +234,12 @@ async def test_parse_with_llm_success(parser_with_mock_llm, sample_location, sam
     assert result.confidence == 0.95
 
 
-@pytest.mark.asyncio
-async def test_parse_with_llm_json_with_extra_text(parser_with_mock_llm, sample_location, sample_inventory):
+async def test_parse_with_llm_json_with_extra_text(parser_with_stub_llm, sample_location, sample_inventory):
     """Test parsing when LLM returns JSON with extra text"""
     # Mock LLM to return JSON with preamble/postamble
-    parser_with_mock_llm.llm_service.generate_text = AsyncMock(
-        return_value='Sure, here is the parsed command: {"type": "take", "target": "sword", "confidence": 0.9}'
-    )
+    parser_with_stub_llm.llm_service.reply = ['Sure, here is the parsed command: {"type": "take", "target": "sword", "confidence": 0.9}']
 
-    result = await parser_with_mock_llm.parse_command(
+    result = await parser_with_stub_llm.parse_command(
         "pick up the sword",
         sample_location,
         sample_inventory
@@ -263,41 +249,163 @@ async def test_parse_with_llm_json_with_extra_text(parser_with_mock_llm, sample_
     assert result.target == "sword"
 
 
-@pytest.mark.asyncio
-async def test_parse_with_llm_fallback_on_error(parser_with_mock_llm, sample_location, sample_inventory):
+async def test_parse_with_llm_stops_reading_after_json(parser_with_stub_llm, sample_location, sample_inventory):
+    """Test that the LLM stream is closed once the command object is complete"""
+    read_past_object = False
+
+    def reply():
+        nonlocal read_past_object
+        yield '{"type": "examine", "target": "sign {north}"'
+        yield ', "confidence": 0.9}'
+        read_past_object = True
+        yield ' and some trailing commentary'
+
+    parser_with_stub_llm.llm_service.reply = reply()
+
+    result = await parser_with_stub_llm.parse_command("read the sign", sample_location, sample_inventory)
+
+    assert result.type == CommandType.EXAMINE
+    assert result.target == "sign {north}"
+    assert not read_past_object
+
+
+async def test_parse_with_llm_non_streamed_reply(sample_location, sample_inventory):
+    """Test that a server answering with plain JSON instead of SSE still parses"""
+    completion = {"messages": [{"role": "assistant", "content": '{"type": "take", "target": "candle", "confidence": 0.9}'}]}
+
+    def handler(request):
+        return httpx.Response(200, content=orjson.dumps(completion), headers={"content-type": "application/json"})
+
+    config = LLMConfig()
+    config.api_url = "https://test-api.example.com"
+    config.access_token = "test-token"
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        parser = CommandParser(llm_service=ScoutLLMService(config, client=client))
+
+        result = await parser.parse_command("fetch me that candle", sample_location, sample_inventory)
+
+    assert result.type == CommandType.TAKE
+    assert result.target == "candle"
+
+
+async def test_parse_with_llm_caches_repeated_input(parser_with_stub_llm, sample_location, sample_inventory):
+    """Test that repeating an input in the same context reuses the LLM parse"""
+    parser_with_stub_llm.llm_service.reply = ['{"type": "move", "target": "north", "confidence": 0.95}']
+
+    first = await parser_with_stub_llm.parse_command("go north", sample_location, sample_inventory)
+    second = await parser_with_stub_llm.parse_command("  Go North ", sample_location, sample_inventory)
+
+    assert parser_with_stub_llm.llm_service.calls == 1
+    assert second.type == first.type == CommandType.MOVE
+    assert second.raw_input == "  Go North "
+
+    # A different inventory is a different prompt context
+    await parser_with_stub_llm.parse_command("go north", sample_location, ["key"])
+    assert parser_with_stub_llm.llm_service.calls == 2
+
+
+async def test_parse_with_llm_stored_parses_survive_restart(parser_with_stub_llm, sample_location, sample_inventory):
+    """Test that LLM parses stored in the database seed a new parser's cache"""
+    db = TinyDB(storage=MemoryStorage)
+    llm = parser_with_stub_llm.llm_service
+    llm.reply = ['{"type": "take", "target": "sword", "confidence": 0.9}']
+
+    await CommandParser(llm_service=llm, db=db).parse_command(
+        "grab sword", sample_location, sample_inventory
+    )
+
+    restarted = CommandParser(llm_service=llm, db=db)
+    assert restarted.load_stored_parses() == 1
+    result = await restarted.parse_command("grab sword", sample_location, sample_inventory)
+
+    assert llm.calls == 1
+    assert result.type == CommandType.TAKE
+    assert result.target == "sword"
+    assert result.raw_input == "grab sword"
+
+
+async def test_parse_with_llm_only_current_parses_survive_restart(parser_with_stub_llm, sample_location, sample_inventory):
+    """Test that fallbacks aren't stored and parses from another model are dropped"""
+    db = TinyDB(storage=MemoryStorage)
+    llm = parser_with_stub_llm.llm_service
+    parser = CommandParser(llm_service=llm, db=db)
+
+    llm.reply = ['not json']
+    await parser.parse_command("fetch me that sword", sample_location, sample_inventory)
+    assert len(db.table('parse_cache')) == 0
+
+    llm.reply = ['{"type": "take", "target": "sword", "confidence": 0.9}']
+    await parser.parse_command("grab sword", sample_location, sample_inventory)
+    assert len(db.table('parse_cache')) == 1
+
+    llm.config.model = "other-model"
+    assert CommandParser(llm_service=llm, db=db).load_stored_parses() == 0
+    assert len(db.table('parse_cache')) == 0
+
+
+async def test_parse_common_commands_skip_llm(parser_with_stub_llm, sample_location, sample_inventory):
+    """Test that bare look/inventory/help and exit names never reach the LLM"""
+    cases = [
+        ("look", CommandType.LOOK, None),
+        ("I", CommandType.INVENTORY, None),
+        ("?", CommandType.HELP, None),
+        ("s", CommandType.MOVE, "south"),
+        (" North ", CommandType.MOVE, "north"),
+    ]
+    for cmd, expected_type, expected_target in cases:
+        result = await parser_with_stub_llm.parse_command(cmd, sample_location, sample_inventory)
+        assert result.type == expected_type
+        assert result.target == expected_target
+        assert result.confidence == 1.0
+
+    assert parser_with_stub_llm.llm_service.calls == 0
+
+
+async def test_parse_with_llm_fallback_on_error(parser_with_stub_llm, sample_location, sample_inventory):
     """Test that parser falls back to patterns when LLM fails"""
     # Mock LLM to raise an error
-    parser_with_mock_llm.llm_service.generate_text = AsyncMock(
-        side_effect=Exception("LLM service error")
-    )
+    parser_with_stub_llm.llm_service.error = Exception("LLM service error")
 
     # Should fall back to pattern matching
-    result = await parser_with_mock_llm.parse_command(
-        "inventory",
+    result = await parser_with_stub_llm.parse_command(
+        "take sword",
         sample_location,
         sample_inventory
     )
 
-    assert result.type == CommandType.INVENTORY
-    assert result.confidence == 1.0
+    assert result.type == CommandType.TAKE
+    assert result.confidence == 0.8
 
 
-@pytest.mark.asyncio
-async def test_parse_with_llm_fallback_on_invalid_json(parser_with_mock_llm, sample_location, sample_inventory):
+async def test_parse_with_llm_fallback_on_invalid_json(parser_with_stub_llm, sample_location, sample_inventory):
     """Test that parser falls back when LLM returns invalid JSON"""
     # Mock LLM to return invalid JSON
-    parser_with_mock_llm.llm_service.generate_text = AsyncMock(
-        return_value='This is not valid JSON at all'
-    )
+    parser_with_stub_llm.llm_service.reply = ['This is not valid JSON at all']
 
     # Should fall back to pattern matching
-    result = await parser_with_mock_llm.parse_command(
-        "look",
+    result = await parser_with_stub_llm.parse_command(
+        "drop key",
         sample_location,
         sample_inventory
     )
 
-    assert result.type == CommandType.LOOK
+    assert result.type == CommandType.DROP
+
+
+async def test_parse_with_llm_invalid_json_not_cached(parser_with_stub_llm, sample_location, sample_inventory):
+    """Test that a garbled LLM reply isn't cached, so the next try asks again"""
+    llm = parser_with_stub_llm.llm_service
+    llm.reply = ['{"type": "take", "target": ']
+
+    first = await parser_with_stub_llm.parse_command("fetch me that sword", sample_location, sample_inventory)
+    assert first.type == CommandType.UNKNOWN
+
+    llm.reply = ['{"type": "take", "target": "sword", "confidence": 0.9}']
+    second = await parser_with_stub_llm.parse_command("fetch me that sword", sample_location, sample_inventory)
+
+    assert llm.calls == 2
+    assert second.type == CommandType.TAKE
+    assert second.target == "sword"
 
 
 # ===== System Prompt Tests =====
@@ -324,30 +432,25 @@ def test_get_system_prompt(parser_no_llm):
 
 # ===== Edge Cases =====
 
-@pytest.mark.asyncio
 async def test_parse_empty_command(parser_no_llm, sample_location, sample_inventory):
     """Test parsing empty command"""
     result = await parser_no_llm.parse_command("", sample_location, sample_inventory)
     assert result.type == CommandType.UNKNOWN
 
 
-@pytest.mark.asyncio
 async def test_parse_whitespace_command(parser_no_llm, sample_location, sample_inventory):
     """Test parsing whitespace-only command"""
     result = await parser_no_llm.parse_command("   ", sample_location, sample_inventory)
     assert result.type == CommandType.UNKNOWN
 
 
-@pytest.mark.asyncio
-async def test_parse_case_insensitive(parser_no_llm, sample_location, sample_inventory):
+@pytest.mark.parametrize("cmd,expected_type", [
+    ("INVENTORY", CommandType.INVENTORY),
+    ("Look", CommandType.LOOK),
+    ("Go North", CommandType.MOVE),
+    ("TAKE SWORD", CommandType.TAKE),
+])
+async def test_parse_case_insensitive(parser_no_llm, sample_location, sample_inventory, cmd, expected_type):
     """Test that parsing is case-insensitive"""
-    commands = [
-        ("INVENTORY", CommandType.INVENTORY),
-        ("Look", CommandType.LOOK),
-        ("Go North", CommandType.MOVE),
-        ("TAKE SWORD", CommandType.TAKE)
-    ]
-
-    for cmd, expected_type in commands:
-        result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
-        assert result.type == expected_type
+    result = await parser_no_llm.parse_command(cmd, sample_location, sample_inventory)
+    assert result.type == expected_type
@@ -0,0 +1,299 @@
+"""
+Tests for the database module
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+from types import SimpleNamespace
+
+import orjson
+import pytest
+from tinydb import TinyDB, Query
+
+import app.db
+from app.db import Database, ORJSONStorage, SQLiteStorage, run_db
+from app.services.game_state import GameStateManager
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Path to a temporary SQLite database file"""
+    return tmp_path / "zaik.db"
+
+
+@pytest.fixture
+def db(db_path):
+    """Create a TinyDB instance backed by SQLiteStorage"""
+    database = TinyDB(db_path, storage=SQLiteStorage)
+    yield database
+    database.close()
+
+
+def _row_count(db_path) -> int:
+    """Count document rows committed to the SQLite file"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_wal_mode_enabled(db, db_path):
+    """Test that the database is opened in WAL journal mode"""
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        conn.close()
+
+
+def test_insert_and_query(db):
+    """Test the TinyDB table surface on top of SQLite"""
+    table = db.table("adventures")
+    table.insert({"id": "a1", "name": "First"})
+    table.insert({"id": "a2", "name": "Second"})
+
+    assert table.get(Query().id == "a2")["name"] == "Second"
+    assert len(table.all()) == 2
+
+
+def test_data_persists_across_reopen(db_path):
+    """Test that committed documents survive closing the database"""
+    first = TinyDB(db_path, storage=SQLiteStorage)
+    first.table("game_sessions").insert({"id": "s1", "inventory": ["key"]})
+    first.table("game_sessions").upsert({"id": "s1", "inventory": ["key", "torch"]}, Query().id == "s1")
+    first.close()
+
+    second = TinyDB(db_path, storage=SQLiteStorage)
+    session = second.table("game_sessions").get(Query().id == "s1")
+    second.close()
+
+    assert session["inventory"] == ["key", "torch"]
+
+
+def test_sees_commits_from_other_connections(db, db_path):
+    """Test that writes by another process (e.g. the CLI) are picked up"""
+    table = db.table("adventures")
+    table.insert({"id": "a1"})
+    assert len(table.all()) == 1
+
+    other = TinyDB(db_path, storage=SQLiteStorage)
+    other.table("adventures").insert({"id": "a2"})
+    other.close()
+
+    assert sorted(doc["id"] for doc in table.all()) == ["a1", "a2"]
+
+
+def test_cached_sessions_see_commits_from_other_connections(db, db_path):
+    """Test that a cached session isn't served after another process changed it"""
+    manager = GameStateManager(db)
+    session = manager.create_session("adventure_1", "start")
+    assert manager.get_session(session.id).inventory == []
+
+    other = TinyDB(db_path, storage=SQLiteStorage)
+    other.table("game_sessions").update({"inventory": ["key"]}, Query().id == session.id)
+    other.close()
+
+    assert manager.get_session(session.id).inventory == ["key"]
+
+
+def test_remove_deletes_rows(db, db_path):
+    """Test that removed documents are deleted from SQLite"""
+    table = db.table("game_sessions")
+    table.insert({"id": "s1"})
+    table.insert({"id": "s2"})
+    table.remove(Query().id == "s1")
+
+    assert _row_count(db_path) == 1
+
+
+def test_only_changed_rows_are_written(db):
+    """Test that a write only touches documents whose content changed"""
+    table = db.table("game_sessions")
+    table.insert({"id": "s1", "n": 0})
+    table.insert({"id": "s2", "n": 0})
+
+    statements = []
+    db.storage._conn.set_trace_callback(statements.append)
+    table.update({"n": 1}, Query().id == "s2")
+    db.storage._conn.set_trace_callback(None)
+
+    writes = [s for s in statements if s.startswith("INSERT OR REPLACE")]
+    assert len(writes) == 1
+    assert '"s2"' in writes[0]
+
+
+def test_write_only_serializes_changed_documents(db, monkeypatch):
+    """Test that a write doesn't re-serialize documents or tables it didn't change"""
+    db.table("adventures").insert_multiple({"id": f"a{i}"} for i in range(5))
+    sessions = db.table("game_sessions")
+    sessions.insert_multiple({"id": f"s{i}", "n": 0} for i in range(50))
+
+    dumped = []
+    real_dumps = orjson.dumps
+    monkeypatch.setattr(app.db, "orjson", SimpleNamespace(
+        loads=orjson.loads,
+        dumps=lambda document: dumped.append(document) or real_dumps(document),
+    ))
+    sessions.update({"n": 1}, Query().id == "s7")
+    sessions.remove(Query().id == "s8")
+    sessions.insert({"id": "s50", "n": 0})
+
+    assert dumped == [{"id": "s7", "n": 1}, {"id": "s50", "n": 0}]
+
+
+def test_in_place_updates_persist_across_reopen(db_path):
+    """Test that updated, removed and inserted documents all reach SQLite"""
+    first = TinyDB(db_path, storage=SQLiteStorage)
+    sessions = first.table("game_sessions")
+    sessions.insert_multiple({"id": f"s{i}", "n": 0} for i in range(3))
+    sessions.update({"n": 1}, Query().id == "s0")
+    sessions.remove(Query().id == "s1")
+    sessions.insert({"id": "s3", "n": 0})
+    sessions.update({"n": 2}, Query().id == "s3")
+    first.close()
+
+    second = TinyDB(db_path, storage=SQLiteStorage)
+    stored = {doc["id"]: doc["n"] for doc in second.table("game_sessions").all()}
+    second.close()
+
+    assert stored == {"s0": 1, "s2": 0, "s3": 2}
+
+
+def test_batch_defers_commit_until_exit(db, db_path):
+    """Test that writes inside batch() land in a single commit"""
+    table = db.table("game_sessions")
+
+    with db.storage.batch():
+        table.insert({"id": "s1"})
+        table.insert({"id": "s2"})
+        # Nothing committed yet, but reads see the pending writes
+        assert _row_count(db_path) == 0
+        assert len(table.all()) == 2
+
+    assert _row_count(db_path) == 2
+
+
+def test_drop_tables_clears_rows(db, db_path):
+    """Test that dropping all tables removes every row"""
+    db.table("adventures").insert({"id": "a1"})
+    db.drop_tables()
+
+    assert _row_count(db_path) == 0
+    assert db.table("adventures").all() == []
+
+
+def test_database_singleton_recreate(tmp_path, monkeypatch):
+    """Test that the shared Database is reused and recreate() starts empty"""
+    monkeypatch.setenv("ZAIK_DB_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(Database, "_instance", None)
+    database = Database()
+    assert Database() is database
+
+    database.db.table("adventures").insert({"id": "a1"})
+    database.recreate()
+
+    assert database.db.table("adventures").all() == []
+    database.close()
+
+
+def test_reopen_follows_db_dir_changes(tmp_path, monkeypatch):
+    """Test that the database path is read from the environment on each open"""
+    monkeypatch.setenv("ZAIK_DB_DIR", str(tmp_path / "first"))
+    monkeypatch.setattr(Database, "_instance", None)
+    database = Database()
+    database.close()
+
+    monkeypatch.setenv("ZAIK_DB_DIR", str(tmp_path / "second"))
+    Database().db.table("adventures").insert({"id": "a1"})
+    database.close()
+
+    assert (tmp_path / "second" / "zaik.db").exists()
+
+
+def test_reset_drops_cached_sessions(tmp_path, monkeypatch):
+    """Test that sessions are gone after reset() instead of served from the cache"""
+    monkeypatch.setenv("ZAIK_DB_DIR", str(tmp_path))
+    monkeypatch.setattr(Database, "_instance", None)
+    database = Database()
+    manager = GameStateManager(database.db)
+    session = manager.create_session("adventure_1", "start")
+
+    database.reset()
+
+    assert manager.get_session(session.id) is None
+    with pytest.raises(ValueError, match="not found"):
+        manager.add_item(session.id, "sword")
+    database.close()
+
+
+def test_legacy_json_database_imported_once(tmp_path, monkeypatch):
+    """Test that an existing zaik.json is copied into a new zaik.db on first open"""
+    legacy = tmp_path / "zaik.json"
+    legacy.write_text(json.dumps({"game_sessions": {"1": {"id": "s1", "inventory": ["key"]}}}))
+    monkeypatch.setenv("ZAIK_DB_DIR", str(tmp_path))
+    monkeypatch.setattr(Database, "_instance", None)
+    database = Database()
+    session = database.db.table("game_sessions").get(Query().id == "s1")
+    assert session["inventory"] == ["key"]
+    assert not legacy.exists()
+    assert (tmp_path / "zaik.json.imported").exists()
+
+    # A fresh database stays empty instead of importing the old data again
+    database.recreate()
+    assert database.db.table("game_sessions").all() == []
+    database.close()
+
+
+def test_json_backend_buffers_until_flush(tmp_path, monkeypatch):
+    """Test that the legacy JSON backend only writes the file on flush()"""
+    monkeypatch.setenv("ZAIK_DB_DIR", str(tmp_path))
+    monkeypatch.setenv("ZAIK_DB_NAME", "zaik.json")
+    monkeypatch.setattr(Database, "_instance", None)
+    database = Database()
+    database.db.table("adventures").insert({"id": "a1"})
+    assert "a1" not in (tmp_path / "zaik.json").read_text()
+
+    database.flush()
+    assert "a1" in (tmp_path / "zaik.json").read_text()
+    database.close()
+
+
+def test_orjson_storage_reads_existing_json_files(tmp_path):
+    """Test that ORJSONStorage reads and rewrites TinyDB's JSON format"""
+    path = tmp_path / "zaik.json"
+    path.write_text(json.dumps({"adventures": {"1": {"id": "a1", "name": "Café"}}}))
+
+    database = TinyDB(path, storage=ORJSONStorage)
+    assert database.table("adventures").get(Query().id == "a1")["name"] == "Café"
+    database.table("adventures").insert({"id": "a2"})
+    database.close()
+
+    assert len(json.loads(path.read_text())["adventures"]) == 2
+
+
+async def test_run_db_runs_calls_one_at_a_time_off_the_loop():
+    """Test that run_db serializes database calls on a worker thread"""
+    active = 0
+    peak = 0
+    threads = set()
+    lock = threading.Lock()
+
+    def work(delay):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        threads.add(threading.current_thread())
+        threading.Event().wait(delay)
+        with lock:
+            active -= 1
+        return delay
+
+    results = await asyncio.gather(*(run_db(work, delay=0.01) for _ in range(4)))
+
+    assert results == [0.01] * 4
+    assert peak == 1
+    assert threading.current_thread() not in threads
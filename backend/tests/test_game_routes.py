@@ -0,0 +1,140 @@
+"""
+Tests for the game API routes
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from tinydb import TinyDB
+from tinydb.storages import MemoryStorage
+
+from app.main import app
+from app.dependencies import get_command_parser, get_database, get_game_state_manager
+from app.services.adventures import clear_adventure_cache
+from app.services.command_parser import CommandParser
+from app.services.game_state import GameStateManager, clear_session_cache
+
+
+class StubLLM:
+    """Stand-in for ScoutLLMService that streams a canned reply"""
+
+    def __init__(self):
+        self.config = SimpleNamespace(is_configured=lambda: True, model="test-model")
+        self.reply = ()
+        self.calls = 0
+
+    def generate_text_stream(self, *args, **kwargs):
+        self.calls += 1
+        return self._stream()
+
+    async def _stream(self):
+        for chunk in self.reply:
+            yield chunk
+
+
+@pytest.fixture
+def llm():
+    """Stub LLM behind the command parser"""
+    return StubLLM()
+
+
+@pytest.fixture
+def manager():
+    """GameStateManager over an in-memory database holding the test adventure"""
+    db = TinyDB(storage=MemoryStorage)
+    db.table('adventures').insert({
+        "id": "default",
+        "name": "Test Adventure",
+        "description": "A test adventure",
+        "starting_location_id": "room1",
+        "locations": {
+            "room1": {
+                "id": "room1",
+                "name": "First Room",
+                "description": "A simple test room",
+                "items": [{"id": "lantern", "name": "brass lantern", "description": "It glows"}]
+            }
+        }
+    })
+    return GameStateManager(db)
+
+
+@pytest.fixture
+def client(manager, llm):
+    """Create a test client backed by an in-memory database and a stub LLM"""
+    parser = CommandParser(llm_service=llm)
+    app.dependency_overrides[get_database] = lambda: manager.db
+    app.dependency_overrides[get_game_state_manager] = lambda: manager
+    app.dependency_overrides[get_command_parser] = lambda: parser
+    clear_adventure_cache()
+
+    # Not used as a context manager, so the lifespan (real DB, LLM) doesn't run
+    yield TestClient(app)
+
+    app.dependency_overrides.clear()
+    clear_adventure_cache()
+    clear_session_cache()
+
+
+def test_get_state_conditional_get(client):
+    """Test that an unchanged state poll returns 304"""
+    session_id = client.post("/api/game/new", json={}).json()["session_id"]
+
+    first = client.get(f"/api/game/{session_id}/state")
+    assert first.status_code == 200
+    assert first.json()["message"].startswith("First Room")
+    etag = first.headers["etag"]
+
+    again = client.get(f"/api/game/{session_id}/state", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+
+def test_get_state_etag_changes_with_adventure(client, manager):
+    """Test that editing the adventure invalidates a session's state ETag"""
+    session_id = client.post("/api/game/new", json={}).json()["session_id"]
+    etag = client.get(f"/api/game/{session_id}/state").headers["etag"]
+
+    # Edit the room text the way a migration would
+    adventures = manager.db.table('adventures')
+    locations = dict(adventures.all()[0]["locations"])
+    locations["room1"] = {**locations["room1"], "description": "A repainted test room"}
+    adventures.update({"locations": locations})
+    clear_adventure_cache()
+
+    again = client.get(f"/api/game/{session_id}/state", headers={"If-None-Match": etag})
+    assert again.status_code == 200
+    assert "repainted" in again.json()["message"]
+    assert again.headers["etag"] != etag
+
+
+def test_get_state_missing_session(client):
+    """Test requesting state for a session that doesn't exist"""
+    assert client.get("/api/game/missing/state").status_code == 404
+
+
+def test_send_command_persists_state(client, llm, manager):
+    """Test that a parsed command is executed and its state saved"""
+    session_id = client.post("/api/game/new", json={}).json()["session_id"]
+    llm.reply = ['{"type": "take", ', '"target": "lantern", "confidence": 0.9}']
+
+    response = client.post(f"/api/game/{session_id}/command", json={"command": "grab the lamp"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] is True
+    assert body["message"] == "You take the brass lantern."
+    assert body["state"]["inventory"] == ["lantern"]
+    assert llm.calls == 1
+
+    # Read back from storage rather than the session cache
+    clear_session_cache()
+    assert manager.get_session(session_id).inventory == ["lantern"]
+
+
+def test_send_command_missing_session(client):
+    """Test sending a command to a session that doesn't exist"""
+    response = client.post("/api/game/missing/command", json={"command": "look"})
+    assert response.status_code == 404
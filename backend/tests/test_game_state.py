@@ -2,6 +2,8 @@
 Tests for Game State Manager
 """
 
+import re
+
 import pytest
 from datetime import datetime
 from tinydb import TinyDB
@@ -11,12 +13,24 @@ from app.services import GameStateManager
 from app.models import GameSession
 
 
+# Error messages expected from operations on a missing session or item
+_SESSION_NOT_FOUND = re.compile(r"Session .* not found")
+_ITEM_NOT_IN_INVENTORY = re.compile(r"Item .* not in inventory")
+
+
 @pytest.fixture
 def db():
     """Create an in-memory TinyDB instance for testing"""
     return TinyDB(storage=MemoryStorage)
 
 
+def _reopen(db):
+    """Copy a database's stored contents into a new one, as after a restart"""
+    reopened = TinyDB(storage=MemoryStorage)
+    reopened.storage.write(db.storage.read())
+    return reopened
+
+
 @pytest.fixture
 def game_state_manager(db):
     """Create a GameStateManager with in-memory database"""
@@ -82,17 +96,16 @@ def test_get_nonexistent_session(game_state_manager):
 
 def test_save_session_updates_timestamps(game_state_manager, sample_session):
     """Test that saving a session updates timestamps"""
-    original_updated_at = sample_session.updated_at
-
-    # Wait a tiny bit to ensure timestamp changes
-    import time
-    time.sleep(0.01)
+    # Backdate the session so the new timestamps differ without waiting
+    original_updated_at = datetime(2000, 1, 1)
+    sample_session.updated_at = original_updated_at
+    sample_session.last_played_at = original_updated_at
 
     game_state_manager.save_session(sample_session)
 
     retrieved = game_state_manager.get_session(sample_session.id)
     assert retrieved.updated_at > original_updated_at
-    assert retrieved.last_played_at > original_updated_at
+    assert retrieved.last_played_at == retrieved.updated_at
 
 
 def test_delete_session(game_state_manager, sample_session):
@@ -109,6 +122,103 @@ def test_delete_session(game_state_manager, sample_session):
     assert game_state_manager.get_session(session_id) is None
 
 
+def test_get_session_served_from_cache(db, game_state_manager, sample_session):
+    """Test that loaded sessions are cached and shared across managers on one database"""
+    game_state_manager.add_item(sample_session.id, "lantern")
+
+    # Later reads don't go back to the sessions table
+    db.table('game_sessions').truncate()
+    other_manager = GameStateManager(db)
+    cached = other_manager.get_session(sample_session.id)
+
+    assert "lantern" in cached.inventory
+    assert "lantern" in game_state_manager.get_session(sample_session.id).inventory
+
+
+def test_get_session_returns_independent_copies(game_state_manager, sample_session):
+    """Test that changing a loaded session without saving it doesn't leak to other readers"""
+    session = game_state_manager.get_session(sample_session.id)
+    session.add_to_inventory("sword")
+    session.global_flags["armed"] = True
+    session.current_location_id = "elsewhere"
+
+    fresh = game_state_manager.get_session(sample_session.id)
+    assert fresh is not session
+    assert fresh.inventory == []
+    assert fresh.global_flags == {}
+    assert fresh.current_location_id == "start_location"
+
+
+def test_delete_session_evicts_cache(db, game_state_manager, sample_session):
+    """Test that deleting a session through one manager hides it from the others"""
+    other_manager = GameStateManager(db)
+    assert other_manager.get_session(sample_session.id) is not None
+
+    game_state_manager.delete_session(sample_session.id)
+
+    assert other_manager.get_session(sample_session.id) is None
+
+
+def test_mutate_saves_once(game_state_manager, sample_session, monkeypatch):
+    """Test that nested operations inside mutate() are saved in one write"""
+    saves = []
+    original_save = game_state_manager.save_session
+    monkeypatch.setattr(game_state_manager, "save_session", lambda s: saves.append(original_save(s)))
+
+    with game_state_manager.mutate(sample_session.id) as session:
+        game_state_manager.add_item(session.id, "sword")
+        game_state_manager.set_global_flag(session.id, "armed", True)
+        assert saves == []
+
+    assert len(saves) == 1
+    assert "sword" in game_state_manager.get_session(sample_session.id).inventory
+
+
+def test_mutate_discards_changes_on_error(game_state_manager, sample_session):
+    """Test that a failed mutate() block leaves the stored session untouched"""
+    with pytest.raises(RuntimeError):
+        with game_state_manager.mutate(sample_session.id) as session:
+            session.add_to_inventory("sword")
+            raise RuntimeError("boom")
+
+    assert "sword" not in game_state_manager.get_session(sample_session.id).inventory
+
+
+def test_get_session_cold_load(db, game_state_manager, sample_session):
+    """Test that a session loaded from storage has typed fields and working indexes"""
+    game_state_manager.add_item(sample_session.id, "Golden_Key")
+
+    loaded = GameStateManager(_reopen(db)).get_session(sample_session.id)
+
+    assert isinstance(loaded.created_at, datetime)
+    assert loaded.has_item("Golden_Key")
+    assert loaded.find_inventory_item("golden") == "Golden_Key"
+    assert loaded.has_visited("start_location")
+
+
+def test_save_session_writes_changed_fields_only(db, game_state_manager, sample_session):
+    """Test that saving a stored session patches only the fields that changed"""
+    table = db.table('game_sessions')
+    # Plant a marker that a full rewrite of the document would drop
+    table.update({"marker": True})
+
+    game_state_manager.set_global_flag(sample_session.id, "bell_rung", True)
+
+    stored = table.all()[0]
+    assert stored["marker"] is True
+    assert stored["global_flags"] == {"bell_rung": True}
+
+
+def test_save_session_with_missing_row_fails(db, game_state_manager, sample_session):
+    """Test that patching a session whose row is gone raises instead of dropping the write"""
+    db.table('game_sessions').truncate()
+
+    with pytest.raises(ValueError, match=_SESSION_NOT_FOUND):
+        game_state_manager.add_item(sample_session.id, "sword")
+
+    assert game_state_manager.get_session(sample_session.id) is None
+
+
 def test_list_sessions(game_state_manager):
     """Test listing all sessions"""
     # Create multiple sessions
@@ -142,9 +252,19 @@ def test_move_to_location(game_state_manager, sample_session):
     assert "start_location" in updated_session.visited_locations
 
 
+def test_visited_locations_keep_first_visit_order(game_state_manager, sample_session):
+    """Test that revisiting a location doesn't duplicate it"""
+    game_state_manager.move_to_location(sample_session.id, "hall")
+    game_state_manager.move_to_location(sample_session.id, "start_location")
+    game_state_manager.move_to_location(sample_session.id, "hall")
+
+    session = game_state_manager.get_session(sample_session.id)
+    assert session.visited_locations == ["start_location", "hall"]
+
+
 def test_move_to_location_invalid_session(game_state_manager):
     """Test moving with invalid session ID"""
-    with pytest.raises(ValueError, match="Session .* not found"):
+    with pytest.raises(ValueError, match=_SESSION_NOT_FOUND):
         game_state_manager.move_to_location("invalid_id", "some_location")
 
 
@@ -156,7 +276,7 @@ def test_get_current_location(game_state_manager, sample_session):
 
 def test_get_current_location_invalid_session(game_state_manager):
     """Test getting current location with invalid session"""
-    with pytest.raises(ValueError, match="Session .* not found"):
+    with pytest.raises(ValueError, match=_SESSION_NOT_FOUND):
         game_state_manager.get_current_location("invalid_id")
 
 
@@ -186,7 +306,7 @@ def test_has_visited_location(game_state_manager, sample_session):
 
 def test_has_visited_location_invalid_session(game_state_manager):
     """Test checking visited location with invalid session"""
-    with pytest.raises(ValueError, match="Session .* not found"):
+    with pytest.raises(ValueError, match=_SESSION_NOT_FOUND):
         game_state_manager.has_visited_location("invalid_id", "some_location")
 
 
@@ -211,7 +331,7 @@ def test_add_duplicate_item(game_state_manager, sample_session):
 
 def test_add_item_invalid_session(game_state_manager):
     """Test adding item with invalid session"""
-    with pytest.raises(ValueError, match="Session .* not found"):
+    with pytest.raises(ValueError, match=_SESSION_NOT_FOUND):
         game_state_manager.add_item("invalid_id", "sword")
 
 
@@ -229,13 +349,13 @@ def test_remove_item(game_state_manager, sample_session):
 
 def test_remove_nonexistent_item(game_state_manager, sample_session):
     """Test removing an item that's not in inventory"""
-    with pytest.raises(ValueError, match="Item .* not in inventory"):
+    with pytest.raises(ValueError, match=_ITEM_NOT_IN_INVENTORY):
         game_state_manager.remove_item(sample_session.id, "nonexistent_item")
 
 
 def test_remove_item_invalid_session(game_state_manager):
     """Test removing item with invalid session"""
-    with pytest.raises(ValueError, match="Session .* not found"):
+    with pytest.raises(ValueError, match=_SESSION_NOT_FOUND):
         game_state_manager.remove_item("invalid_id", "sword")
 
 
@@ -251,9 +371,41 @@ def test_has_item(game_state_manager, sample_session):
     assert game_state_manager.has_item(sample_session.id, "sword") is True
 
 
+def test_assigning_lists_updates_lookups(sample_session):
+    """Test that replacing inventory or visited_locations keeps lookups in step"""
+    sample_session.inventory = ["Lantern"]
+    sample_session.visited_locations = ["cellar"]
+
+    assert sample_session.has_item("Lantern")
+    assert sample_session.find_inventory_item("lantern") == "Lantern"
+    assert sample_session.has_visited("cellar")
+    assert not sample_session.has_visited("start_location")
+    assert sample_session.dirty_fields == {"inventory", "visited_locations"}
+
+
+def test_in_place_changes_survive_reload(db, game_state_manager, sample_session):
+    """Test that containers changed directly are indexed and saved like helper changes"""
+    with game_state_manager.mutate(sample_session.id) as session:
+        session.inventory.append("Lantern")
+        session.visited_locations.append("cellar")
+        session.location_states.setdefault("cellar", {})["lit"] = True
+        session.global_flags["bell_rung"] = True
+        assert session.has_item("Lantern")
+        assert session.find_inventory_item("lantern") == "Lantern"
+        assert session.has_visited("cellar")
+
+    loaded = GameStateManager(_reopen(db)).get_session(sample_session.id)
+
+    assert loaded.inventory == ["Lantern"]
+    assert loaded.has_item("Lantern")
+    assert loaded.visited_locations == ["start_location", "cellar"]
+    assert loaded.location_states == {"cellar": {"lit": True}}
+    assert loaded.global_flags == {"bell_rung": True}
+
+
 def test_has_item_invalid_session(game_state_manager):
     """Test checking item with invalid session"""
-    with pytest.raises(ValueError, match="Session .* not found"):
+    with pytest.raises(ValueError, match=_SESSION_NOT_FOUND):
         game_state_manager.has_item("invalid_id", "sword")
 
 
@@ -286,10 +438,24 @@ def test_get_inventory_returns_copy(game_state_manager, sample_session):
 
 def test_get_inventory_invalid_session(game_state_manager):
     """Test getting inventory with invalid session"""
-    with pytest.raises(ValueError, match="Session .* not found"):
+    with pytest.raises(ValueError, match=_SESSION_NOT_FOUND):
         game_state_manager.get_inventory("invalid_id")
 
 
+def test_find_inventory_item(game_state_manager, sample_session):
+    """Test finding inventory items by case-insensitive or partial ID"""
+    game_state_manager.add_item(sample_session.id, "rusty_key")
+    game_state_manager.add_item(sample_session.id, "Key")
+
+    session = game_state_manager.get_session(sample_session.id)
+    assert session.find_inventory_item("key") == "Key"
+    assert session.find_inventory_item("rusty") == "rusty_key"
+    assert session.find_inventory_item("lamp") is None
+
+    session.remove_from_inventory("Key")
+    assert session.find_inventory_item("key") == "rusty_key"
+
+
 # ===== State Flag Operations Tests =====
 
 def test_set_location_flag(game_state_manager, sample_session):
@@ -321,7 +487,7 @@ def test_set_multiple_location_flags(game_state_manager, sample_session):
 
 def test_set_location_flag_invalid_session(game_state_manager):
     """Test setting location flag with invalid session"""
-    with pytest.raises(ValueError, match="Session .* not found"):
+    with pytest.raises(ValueError, match=_SESSION_NOT_FOUND):
         game_state_manager.set_location_flag(
             "invalid_id", "forest", "puzzle_solved", True
         )
@@ -353,7 +519,7 @@ def test_get_location_flag_default_false(game_state_manager, sample_session):
 
 def test_get_location_flag_invalid_session(game_state_manager):
     """Test getting location flag with invalid session"""
-    with pytest.raises(ValueError, match="Session .* not found"):
+    with pytest.raises(ValueError, match=_SESSION_NOT_FOUND):
         game_state_manager.get_location_flag(
             "invalid_id", "forest", "puzzle_solved"
         )
@@ -390,7 +556,7 @@ def test_set_multiple_global_flags(game_state_manager, sample_session):
 
 def test_set_global_flag_invalid_session(game_state_manager):
     """Test setting global flag with invalid session"""
-    with pytest.raises(ValueError, match="Session .* not found"):
+    with pytest.raises(ValueError, match=_SESSION_NOT_FOUND):
         game_state_manager.set_global_flag("invalid_id", "flag", True)
 
 
@@ -420,13 +586,13 @@ def test_get_global_flag_default_false(game_state_manager, sample_session):
 
 def test_get_global_flag_invalid_session(game_state_manager):
     """Test getting global flag with invalid session"""
-    with pytest.raises(ValueError, match="Session .* not found"):
+    with pytest.raises(ValueError, match=_SESSION_NOT_FOUND):
         game_state_manager.get_global_flag("invalid_id", "dragon_defeated")
 
 
 # ===== Integration Tests =====
 
-def test_complete_game_flow(game_state_manager):
+def test_complete_game_flow(db, game_state_manager):
     """Test a complete game flow with multiple operations"""
     # Create session
     session = game_state_manager.create_session(
@@ -434,24 +600,26 @@ def test_complete_game_flow(game_state_manager):
         starting_location_id="entrance"
     )
 
-    # Move around
-    game_state_manager.move_to_location(session.id, "courtyard")
-    game_state_manager.move_to_location(session.id, "treasure_room")
+    # Play the turns as one batch, saved once at the end
+    with game_state_manager.mutate(session.id):
+        # Move around
+        game_state_manager.move_to_location(session.id, "courtyard")
+        game_state_manager.move_to_location(session.id, "treasure_room")
 
-    # Collect items
-    game_state_manager.add_item(session.id, "golden_key")
-    game_state_manager.add_item(session.id, "ancient_sword")
+        # Collect items
+        game_state_manager.add_item(session.id, "golden_key")
+        game_state_manager.add_item(session.id, "ancient_sword")
 
-    # Set some flags
-    game_state_manager.set_location_flag(
-        session.id, "courtyard", "door_unlocked", True
-    )
-    game_state_manager.set_global_flag(
-        session.id, "temple_explored", True
-    )
+        # Set some flags
+        game_state_manager.set_location_flag(
+            session.id, "courtyard", "door_unlocked", True
+        )
+        game_state_manager.set_global_flag(
+            session.id, "temple_explored", True
+        )
 
-    # Verify final state
-    final_session = game_state_manager.get_session(session.id)
+    # Verify final state, as stored
+    final_session = GameStateManager(_reopen(db)).get_session(session.id)
 
     assert final_session.current_location_id == "treasure_room"
     assert len(final_session.visited_locations) == 3
@@ -2,9 +2,15 @@
 Tests for Scout LLM service integration
 """
 
+import asyncio
+import time
+from contextlib import aclosing, asynccontextmanager
+
+import httpx
+import orjson
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
-from app.llm import ScoutLLMService, LLMConfig, LLMMessage
+from app.llm import ScoutLLMService, LLMConfig, LLMMessage, _RateLimiter, _truncate_messages
 
 
 @pytest.fixture
@@ -17,28 +23,60 @@ def mock_config():
     return config
 
 
+@pytest.fixture(scope="module")
+async def http_client():
+    """One HTTP client for every service in the module (tests patch its methods)"""
+    client = httpx.AsyncClient()
+    yield client
+    await client.aclose()
+
+
 @pytest.fixture
-def llm_service(mock_config):
-    """Create an LLM service with mock config"""
-    return ScoutLLMService(mock_config)
+def llm_service(mock_config, http_client):
+    """Create an LLM service with mock config on the shared client"""
+    return ScoutLLMService(mock_config, client=http_client)
+
+
+def _stream_response(
+    content: bytes, status_code: int = 200, delay: float = 0.0, content_type: str = None
+):
+    """Build a stand-in for client.stream() that yields a canned response"""
+    headers = {"content-type": content_type} if content_type else None
+
+    @asynccontextmanager
+    async def fake_stream(method, url, **kwargs):
+        if delay:
+            await asyncio.sleep(delay)
+        yield httpx.Response(
+            status_code, content=content, headers=headers, request=httpx.Request(method, url)
+        )
+
+    return fake_stream
 
 
-@pytest.mark.asyncio
-async def test_health_check_not_configured():
+async def test_health_check_not_configured(http_client):
     """Test health check when LLM is not configured"""
     config = LLMConfig()
     config.api_url = ""
     config.access_token = ""
 
-    service = ScoutLLMService(config)
+    service = ScoutLLMService(config, client=http_client)
     result = await service.health_check()
 
     assert result["status"] == "not_configured"
     assert "not configured" in result["message"].lower()
+
+
+async def test_close_leaves_passed_in_client_open(mock_config, http_client):
+    """Test that a service only closes the HTTP client it created itself"""
+    await ScoutLLMService(mock_config, client=http_client).close()
+    assert not http_client.is_closed
+
+    service = ScoutLLMService(mock_config)
     await service.close()
+    assert service.client.is_closed
 
 
-@pytest.mark.asyncio
 async def test_health_check_success(llm_service, mock_config):
     """Test successful health check"""
     # Mock the HTTP client
@@ -52,35 +90,57 @@ async def test_health_check_success(llm_service, mock_config):
 
         assert result["status"] == "healthy"
         assert result["model"] == mock_config.model
-        mock_get.assert_called_once_with(f"{mock_config.api_url}/health")
+        mock_get.assert_called_once_with(f"{mock_config.api_url}/health", timeout=5.0)
+
 
-    await llm_service.close()
+async def test_health_check_timeout_is_unreachable(llm_service, mock_config):
+    """Test that a probe exceeding the health timeout reports unreachable"""
+    mock_config.health_timeout = 0.01
+
+    async def hanging_get(*args, **kwargs):
+        await asyncio.sleep(1)
+
+    with patch.object(llm_service.client, 'get', side_effect=hanging_get):
+        result = await llm_service.health_check()
 
+    assert result["status"] == "unreachable"
 
-@pytest.mark.asyncio
-async def test_chat_completion_not_configured():
+
+async def test_probe_endpoints_runs_concurrently(llm_service):
+    """Test probing several endpoints returns one result per URL in order"""
+    async def fake_get(url, **kwargs):
+        await asyncio.sleep(0.01)
+        response = MagicMock()
+        response.status_code = 200 if url.endswith("/ok") else 503
+        return response
+
+    with patch.object(llm_service.client, 'get', side_effect=fake_get):
+        results = await llm_service.probe_endpoints(
+            ["https://a.example.com/ok", "https://b.example.com/down"]
+        )
+
+    assert [r["status"] for r in results] == ["healthy", "error"]
+
+
+async def test_chat_completion_not_configured(http_client):
     """Test chat completion when service is not configured"""
     config = LLMConfig()
     config.api_url = ""
     config.access_token = ""
 
-    service = ScoutLLMService(config)
+    service = ScoutLLMService(config, client=http_client)
 
     messages = [LLMMessage(role="user", content="Hello")]
 
     with pytest.raises(ValueError, match="not configured"):
         await service.chat_completion(messages)
 
-    await service.close()
-
 
-@pytest.mark.asyncio
 async def test_chat_completion_success(llm_service, mock_config):
     """Test successful chat completion"""
     messages = [LLMMessage(role="user", content="Hello")]
 
-    mock_response = MagicMock()
-    mock_response.json.return_value = {
+    response_body = orjson.dumps({
         "choices": [
             {
                 "message": {
@@ -89,10 +149,9 @@ async def test_chat_completion_success(llm_service, mock_config):
                 }
             }
         ]
-    }
+    })
 
-    with patch.object(llm_service.client, 'post', new_callable=AsyncMock) as mock_post:
-        mock_post.return_value = mock_response
+    with patch.object(llm_service.client, 'stream', side_effect=_stream_response(response_body)) as mock_stream:
 
         result = await llm_service.chat_completion(messages)
 
@@ -100,25 +159,233 @@ async def test_chat_completion_success(llm_service, mock_config):
         assert result["choices"][0]["message"]["content"] == "Hello! How can I help you?"
 
         # Verify the request was made correctly
-        mock_post.assert_called_once()
-        call_args = mock_post.call_args
-        assert call_args[0][0] == f"{mock_config.api_url}/chat/completions"
+        mock_stream.assert_called_once()
+        call_args = mock_stream.call_args
+        assert call_args[0] == ("POST", f"{mock_config.api_url}/api/chat/completion")
 
-        payload = call_args[1]["json"]
+        payload = orjson.loads(call_args[1]["content"])
         assert payload["model"] == mock_config.model
         assert len(payload["messages"]) == 1
         assert payload["messages"][0]["content"] == "Hello"
 
-    await llm_service.close()
+
+async def test_chat_completion_coalesces_identical_requests(llm_service):
+    """Test that identical concurrent requests share one HTTP call"""
+    messages = [LLMMessage(role="user", content="Hello")]
+
+    response_body = orjson.dumps({"messages": [{"role": "assistant", "content": "Hi"}]})
+
+    with patch.object(
+        llm_service.client, 'stream', side_effect=_stream_response(response_body, delay=0.01)
+    ) as mock_stream:
+
+        first, second, other = await asyncio.gather(
+            llm_service.chat_completion(messages),
+            llm_service.chat_completion(messages),
+            llm_service.chat_completion(messages, temperature=0.1),
+        )
+
+        assert first == second == other
+        assert first is not second
+        # The two identical calls were merged; the different temperature was not
+        assert mock_stream.call_count == 2
+        assert llm_service._inflight == {}
+
+
+async def test_chat_completion_caches_low_temperature(llm_service):
+    """Test that only low-temperature responses are served from the cache"""
+    messages = [LLMMessage(role="user", content="Hello")]
+    response_body = orjson.dumps({"messages": [{"role": "assistant", "content": "Hi"}]})
+
+    with patch.object(
+        llm_service.client, 'stream', side_effect=_stream_response(response_body)
+    ) as mock_stream:
+        await llm_service.chat_completion(messages, temperature=0.0)
+        await llm_service.chat_completion(messages, temperature=0.0)
+        assert mock_stream.call_count == 1
+
+        await llm_service.chat_completion(messages, temperature=0.7)
+        await llm_service.chat_completion(messages, temperature=0.7)
+        assert mock_stream.call_count == 3
+
+
+async def test_chat_completion_cache_hits_are_independent(llm_service):
+    """Test that changing one caller's cached response doesn't affect the next"""
+    messages = [LLMMessage(role="user", content="Hello")]
+    response_body = orjson.dumps({"messages": [{"role": "assistant", "content": "Hi"}]})
+
+    with patch.object(llm_service.client, 'stream', side_effect=_stream_response(response_body)):
+        first = await llm_service.chat_completion(messages, temperature=0.0)
+        first["messages"][0]["content"] = "tampered"
+        second = await llm_service.chat_completion(messages, temperature=0.0)
+
+        assert second["messages"][0]["content"] == "Hi"
+
+
+async def test_chat_completion_cache_expires(llm_service):
+    """Test that cached responses are refetched once their TTL has passed"""
+    messages = [LLMMessage(role="user", content="Hello")]
+    response_body = orjson.dumps({"messages": [{"role": "assistant", "content": "Hi"}]})
+
+    with patch.object(
+        llm_service.client, 'stream', side_effect=_stream_response(response_body)
+    ) as mock_stream:
+        await llm_service.chat_completion(messages, temperature=0.0)
+        with patch("app.llm.time.monotonic", return_value=time.monotonic() + 3600):
+            await llm_service.chat_completion(messages, temperature=0.0)
+
+        assert mock_stream.call_count == 2
+
+
+async def test_chat_completion_debug_logging(llm_service, caplog):
+    """Test that debug logging reports the response without failing"""
+    messages = [LLMMessage(role="user", content="Hello")]
+    response_body = orjson.dumps({"messages": [{"role": "assistant", "content": "Hi"}]})
+
+    with patch.object(llm_service.client, 'stream', side_effect=_stream_response(response_body)):
+        with caplog.at_level("DEBUG", logger="app.llm"):
+            await llm_service.chat_completion(messages)
+
+    assert any("LLM Response Body:" in r.getMessage() for r in caplog.records)
+
+
+async def test_chat_completion_http_error(llm_service):
+    """Test that an error status surfaces the streamed error body"""
+    messages = [LLMMessage(role="user", content="Hello")]
+
+    with patch.object(
+        llm_service.client, 'stream', side_effect=_stream_response(b"overloaded", status_code=503)
+    ) as mock_stream, patch("app.llm.asyncio.sleep", new_callable=AsyncMock):
+        with pytest.raises(Exception, match="503 - overloaded"):
+            await llm_service.chat_completion(messages)
+
+        # 503 is transient, so every attempt was used before giving up
+        assert mock_stream.call_count == 3
+
+
+async def test_chat_completion_retries_transient_failures(llm_service):
+    """Test that a 429 and a dropped connection are retried, honoring Retry-After"""
+    messages = [LLMMessage(role="user", content="Hello")]
+    ok_body = orjson.dumps({"messages": [{"role": "assistant", "content": "Hi"}]})
+    attempts = []
+
+    @asynccontextmanager
+    async def flaky_stream(method, url, **kwargs):
+        attempts.append(url)
+        request = httpx.Request(method, url)
+        if len(attempts) == 1:
+            yield httpx.Response(429, headers={"Retry-After": "2"}, request=request)
+        elif len(attempts) == 2:
+            raise httpx.RemoteProtocolError("connection reset", request=request)
+        else:
+            yield httpx.Response(200, content=ok_body, request=request)
+
+    with patch.object(llm_service.client, 'stream', side_effect=flaky_stream), \
+            patch("app.llm.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        result = await llm_service.chat_completion(messages)
+
+    assert result["messages"][0]["content"] == "Hi"
+    assert len(attempts) == 3
+    assert mock_sleep.await_args_list[0].args == (2.0,)
+
+
+async def test_generate_text_stream_yields_deltas(llm_service):
+    """Test that SSE frames are yielded as text deltas in order"""
+    frames = (
+        b'data: {"choices": [{"delta": {"role": "assistant"}}]}\n\n'
+        b'data: {"choices": [{"delta": {"content": "Hel"}}]}\n\n'
+        b': keep-alive\n\n'
+        b'data: {"choices": [{"delta": {"content": "lo"}}]}\n\n'
+        b'data: [DONE]\n\n'
+    )
+
+    with patch.object(
+        llm_service.client, 'stream', side_effect=_stream_response(frames)
+    ) as mock_stream:
+        chunks = [text async for text in llm_service.generate_text_stream("Hi")]
+
+        assert chunks == ["Hel", "lo"]
+        payload = orjson.loads(mock_stream.call_args[1]["content"])
+        assert payload["stream"] is True
+
+
+async def test_generate_text_stream_accepts_plain_json_reply(llm_service):
+    """Test that a non-streamed JSON completion is yielded as one chunk"""
+    response_body = orjson.dumps({"messages": [{"role": "assistant", "content": "Hello"}]})
+
+    with patch.object(
+        llm_service.client, 'stream',
+        side_effect=_stream_response(response_body, content_type="application/json")
+    ):
+        chunks = [text async for text in llm_service.generate_text_stream("Hi")]
+
+        assert chunks == ["Hello"]
+
+
+async def test_generate_text_stream_raises_on_error_frame(llm_service):
+    """Test that an error object sent mid-stream is raised, not dropped"""
+    frames = (
+        b'data: {"choices": [{"delta": {"content": "Hel"}}]}\n\n'
+        b'data: {"error": {"message": "model overloaded"}}\n\n'
+    )
+
+    with patch.object(
+        llm_service.client, 'stream',
+        side_effect=_stream_response(frames, content_type="text/event-stream")
+    ):
+        with pytest.raises(Exception, match="model overloaded"):
+            [text async for text in llm_service.generate_text_stream("Hi")]
+
+
+async def test_generate_text_stream_releases_slot_when_closed_early(llm_service):
+    """Test that closing the stream early ends the request and frees its slot"""
+    frames = (
+        b'data: {"choices": [{"delta": {"content": "Hel"}}]}\n\n'
+        b'data: {"choices": [{"delta": {"content": "lo"}}]}\n\n'
+        b'data: [DONE]\n\n'
+    )
+    slots = llm_service._request_slots._value
+
+    with patch.object(llm_service.client, 'stream', side_effect=_stream_response(frames)):
+        async with aclosing(llm_service.generate_text_stream("Hi")) as chunks:
+            assert await anext(chunks) == "Hel"
+            assert llm_service._request_slots._value == slots - 1
+
+    assert llm_service._request_slots._value == slots
+
+
+async def test_generate_text_many_single_request(llm_service):
+    """Test that several prompts are answered by one batched request"""
+    answer = orjson.dumps(["North", "A lantern"]).decode()
+    response_body = orjson.dumps({"messages": [{"role": "assistant", "content": answer}]})
+
+    with patch.object(
+        llm_service.client, 'stream', side_effect=_stream_response(response_body)
+    ) as mock_stream:
+        result = await llm_service.generate_text_many(["Which way?", "What's here?"])
+
+        assert result == ["North", "A lantern"]
+        assert mock_stream.call_count == 1
+
+
+async def test_generate_text_many_falls_back_to_individual_requests(llm_service):
+    """Test that a reply that isn't a JSON array triggers per-prompt requests"""
+    response_body = orjson.dumps({"messages": [{"role": "assistant", "content": "Sure!"}]})
+
+    with patch.object(
+        llm_service.client, 'stream', side_effect=_stream_response(response_body)
+    ) as mock_stream:
+        result = await llm_service.generate_text_many(["One", "Two"])
+
+        assert result == ["Sure!", "Sure!"]
+        assert mock_stream.call_count == 3
 
 
-@pytest.mark.asyncio
 async def test_generate_text_simple(llm_service, mock_config):
     """Test simple text generation"""
     prompt = "What is the capital of France?"
 
-    mock_response = MagicMock()
-    mock_response.json.return_value = {
+    response_body = orjson.dumps({
         "choices": [
             {
                 "message": {
@@ -127,26 +394,21 @@ async def test_generate_text_simple(llm_service, mock_config):
                 }
             }
         ]
-    }
+    })
 
-    with patch.object(llm_service.client, 'post', new_callable=AsyncMock) as mock_post:
-        mock_post.return_value = mock_response
+    with patch.object(llm_service.client, 'stream', side_effect=_stream_response(response_body)) as mock_stream:
 
         result = await llm_service.generate_text(prompt)
 
         assert result == "The capital of France is Paris."
 
-    await llm_service.close()
-
 
-@pytest.mark.asyncio
 async def test_generate_text_with_system_prompt(llm_service, mock_config):
     """Test text generation with system prompt"""
     system_prompt = "You are a helpful assistant."
     user_prompt = "Hello"
 
-    mock_response = MagicMock()
-    mock_response.json.return_value = {
+    response_body = orjson.dumps({
         "choices": [
             {
                 "message": {
@@ -155,10 +417,9 @@ async def test_generate_text_with_system_prompt(llm_service, mock_config):
                 }
             }
         ]
-    }
+    })
 
-    with patch.object(llm_service.client, 'post', new_callable=AsyncMock) as mock_post:
-        mock_post.return_value = mock_response
+    with patch.object(llm_service.client, 'stream', side_effect=_stream_response(response_body)) as mock_stream:
 
         result = await llm_service.generate_text(
             prompt=user_prompt,
@@ -168,18 +429,15 @@ async def test_generate_text_with_system_prompt(llm_service, mock_config):
         assert result == "Hi there!"
 
         # Verify both system and user messages were sent
-        call_args = mock_post.call_args
-        payload = call_args[1]["json"]
+        call_args = mock_stream.call_args
+        payload = orjson.loads(call_args[1]["content"])
         assert len(payload["messages"]) == 2
         assert payload["messages"][0]["role"] == "system"
         assert payload["messages"][0]["content"] == system_prompt
         assert payload["messages"][1]["role"] == "user"
         assert payload["messages"][1]["content"] == user_prompt
 
-    await llm_service.close()
 
-
-@pytest.mark.asyncio
 async def test_config_is_configured():
     """Test LLMConfig.is_configured method"""
     # Configured
@@ -199,3 +457,27 @@ async def test_config_is_configured():
     config.api_url = "https://api.example.com"
     config.access_token = ""
     assert config.is_configured() is False
+
+
+async def test_rate_limiter_waits_for_token_budget():
+    """Test that the token bucket delays a request once the budget is spent"""
+    limiter = _RateLimiter(requests_per_minute=0, tokens_per_minute=600)  # 10/s
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await limiter.acquire(600)
+    assert loop.time() - start < 0.05
+
+    await limiter.acquire(1)
+    assert loop.time() - start >= 0.08
+
+
+def test_truncate_messages_keeps_system_and_newest_turns():
+    """Test that old turns are dropped once the context budget is exceeded"""
+    system = LLMMessage(role="system", content="s" * 40)  # ~10 tokens
+    turns = [LLMMessage(role="user", content=str(i) * 40) for i in range(5)]
+    messages = [system] + turns
+
+    assert _truncate_messages(messages, 0) is messages
+    assert _truncate_messages(messages, 100) is messages
+    assert _truncate_messages(messages, 30) == [system, turns[3], turns[4]]
@@ -0,0 +1,54 @@
+"""
+Tests for the migration manager
+"""
+
+import pytest
+from tinydb import TinyDB
+from tinydb.storages import MemoryStorage
+
+from app.migrations.manager import MigrationManager, bulk_insert
+
+
+@pytest.fixture
+def db():
+    """Create an in-memory TinyDB instance for testing"""
+    return TinyDB(storage=MemoryStorage)
+
+
+@pytest.fixture
+def manager(db):
+    """Create a MigrationManager with in-memory database"""
+    return MigrationManager(db)
+
+
+def test_migrate_records_versions_that_succeeded(manager):
+    """Test that migrations applied before a failure are still recorded"""
+    def fail(db):
+        raise RuntimeError("boom")
+
+    manager.register_migration("001", "first", lambda db: db.table("t").insert({"n": 1}))
+    manager.register_migration("002", "second", fail)
+
+    with pytest.raises(RuntimeError):
+        manager.migrate()
+
+    assert [m["version"] for m in manager.get_applied_migrations()] == ["001"]
+    assert [m.version for m in manager.get_pending_migrations()] == ["002"]
+
+
+def test_load_migration_files_is_idempotent(manager):
+    """Test that loading migration files twice doesn't register duplicates"""
+    manager.load_migration_files()
+    count = len(manager.migrations)
+    manager.load_migration_files()
+
+    assert count > 0
+    assert len(manager.migrations) == count
+
+
+def test_bulk_insert_in_chunks(db):
+    """Test that bulk_insert writes every record from a generator"""
+    inserted = bulk_insert(db, "items", ({"n": n} for n in range(25)), chunk_size=10)
+
+    assert inserted == 25
+    assert sorted(doc["n"] for doc in db.table("items").all()) == list(range(25))